@@ -0,0 +1,142 @@
+import asyncio
+import math
+import time
+
+import httpx
+
+from app.google_search import GoogleSearch
+from app.job_validation import SearchHit
+from app.log_config import logger
+from app.metrics import SEARCH_PAGE_SECONDS
+from app.rate_limiter import RequestLimiter
+from app.search_guard import SearchAPIError, TransientSearchError
+
+
+class AsyncGoogleSearch(GoogleSearch):
+    """
+    Asyncio variant of GoogleSearch.
+
+    Fetches the first page, then requests the remaining pages concurrently.
+    Pacing is handled by the shared RequestLimiter instead of a random sleep.
+    In incremental mode (`known_links` set) pages are fetched one at a time so
+    paging can stop at the first page made only of known links.
+
+    A failed first page raises; a failure on a later page keeps the results
+    already fetched and sets `error`, so the caller stores them but does not
+    mark the keywords as scraped.
+    """
+
+    _PAGE_SIZE = 10
+
+    async def fetch_page(
+        self, client: httpx.AsyncClient, limiter: RequestLimiter, start_index: int, num: int
+    ) -> list[dict]:
+        params = self.build_params(start_index, num=num)
+        self.pages_fetched += 1
+        if self.cache:
+            cached = self.cache.get(params)
+            if cached is not None:
+                return cached  # No network I/O and no quota spent
+        attempt = 0
+        while True:
+            self.before_call()
+            async with limiter:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(self._BASE_URL, params=params)
+                except httpx.TransportError as e:
+                    response = None
+                    payload, error = {}, TransientSearchError(f"{type(e).__name__}: {e}")
+                SEARCH_PAGE_SECONDS.observe(time.perf_counter() - started)
+            if response is not None:
+                payload, error = self.read_response(response)
+            self.record(error)
+            if error is None:
+                break
+            await asyncio.sleep(self.retry_delay(error, attempt))
+            attempt += 1
+        items = payload.get("items", [])
+        if self.cache:
+            self.cache.set(params, items)
+        return items
+
+    async def search(
+        self, client: httpx.AsyncClient, limiter: RequestLimiter
+    ) -> list[SearchHit]:
+        """
+        Perform the Google Custom Search and retrieve job postings.
+
+        Args:
+            client (httpx.AsyncClient): Shared pooled HTTP client.
+            limiter (RequestLimiter): Shared concurrency cap and rate limiter.
+
+        Returns:
+            List[SearchHit]: The title, link and snippet of each job posting.
+        """
+        if self.known_links is not None:
+            return await self._search_incremental(client, limiter)
+        first_page = await self.fetch_page(
+            client, limiter, 1, min(self._PAGE_SIZE, self.num_results)
+        )
+        if not first_page:
+            logger.info("No results found for the initial search.")
+            return self.results
+        self.results.extend(self.parse_results({"items": first_page}))
+        if len(first_page) < self._PAGE_SIZE:
+            return self.results
+
+        pages = math.ceil(self.num_results / self._PAGE_SIZE)
+        remaining = [
+            self.fetch_page(
+                client,
+                limiter,
+                page * self._PAGE_SIZE + 1,
+                min(self._PAGE_SIZE, self.num_results - page * self._PAGE_SIZE),
+            )
+            for page in range(1, pages)
+        ]
+        # Pages come back in request order, so result ordering matches the sync search
+        for items in await asyncio.gather(*remaining, return_exceptions=True):
+            if isinstance(items, SearchAPIError):
+                self.error = items
+                break
+            if isinstance(items, Exception):
+                raise items
+            if not items:
+                break
+            self.results.extend(self.parse_results({"items": items}))
+        return self.results
+
+    async def _search_incremental(
+        self, client: httpx.AsyncClient, limiter: RequestLimiter
+    ) -> list[SearchHit]:
+        pages = math.ceil(self.num_results / self._PAGE_SIZE)
+        for page in range(pages):
+            try:
+                items = await self.fetch_page(
+                    client,
+                    limiter,
+                    page * self._PAGE_SIZE + 1,
+                    min(self._PAGE_SIZE, self.num_results - page * self._PAGE_SIZE),
+                )
+            except SearchAPIError as e:
+                if page == 0:
+                    raise
+                self.error = e
+                break
+            if not items:
+                if page == 0:
+                    logger.info("No results found for the initial search.")
+                break
+            page_results = self.parse_results({"items": items})
+            self.results.extend(page_results)
+            if self.page_is_known(page_results):
+                self.pages_avoided = pages - page - 1
+                if self.pages_avoided:
+                    logger.debug(
+                        f"Stopping {self.keywords} after page {page + 1}: only known links"
+                    )
+                break
+            if len(items) < self._PAGE_SIZE:
+                break
+        return self.results
@@ -0,0 +1,105 @@
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAMS = re.compile(
+    r"^(utm_\w+|gclid|fbclid|msclkid|mc_\w+|ref|referer|referrer|source|src|"
+    r"gh_src|lever-source|lever-origin|lever-via|coref|t|_ga)$",
+    re.IGNORECASE,
+)
+_LOCALE_SEGMENT = re.compile(r"^[a-z]{2}(-[A-Za-z]{2})?$")
+_REPEATED_SLASHES = re.compile(r"/{2,}")
+_GREENHOUSE_JOB = re.compile(r"^/([^/]+)/jobs/(\d+)(?:/|$)")
+_LEVER_POSTING = re.compile(r"^/([^/]+)/([0-9a-fA-F-]{36})(?:/|$)")
+
+
+def _greenhouse(host: str, path: str, query: dict) -> tuple[str, str, dict]:
+    # Embedded boards link to /embed/job_app?for=<board>&token=<id>
+    if path.startswith("/embed/job_app") and "for" in query and "token" in query:
+        return "boards.greenhouse.io", f"/{query['for']}/jobs/{query['token']}", {}
+    match = _GREENHOUSE_JOB.match(path)
+    if match:
+        return "boards.greenhouse.io", f"/{match.group(1)}/jobs/{match.group(2)}", {}
+    return host, path, query
+
+
+def _lever(host: str, path: str, query: dict) -> tuple[str, str, dict]:
+    # /<company>/<posting-uuid>[/apply]
+    match = _LEVER_POSTING.match(path)
+    if match:
+        return host, f"/{match.group(1)}/{match.group(2).lower()}", {}
+    return host, path, query
+
+
+def _comeet(host: str, path: str, query: dict) -> tuple[str, str, dict]:
+    # /jobs/<company>/<company-uid>/<slug>/<position-uid>; bare and www hosts serve the same
+    if path.startswith("/jobs/"):
+        return "www.comeet.com", path, {}
+    return "www.comeet.com", path, query
+
+
+def _workday(host: str, path: str, query: dict) -> tuple[str, str, dict]:
+    # [/<locale>]/<site>/job/<location>/<title>_<requisition id>
+    segments = [segment for segment in path.split("/") if segment]
+    if segments and _LOCALE_SEGMENT.match(segments[0]):
+        segments = segments[1:]
+    if "job" in segments:
+        return host, "/" + "/".join(segments), {}
+    return host, "/" + "/".join(segments), query
+
+
+_HOST_RULES = (
+    ("greenhouse.io", _greenhouse),
+    ("lever.co", _lever),
+    ("comeet.com", _comeet),
+    ("comeet.co", _comeet),
+    ("myworkdayjobs.com", _workday),
+    ("workday.com", _workday),
+)
+
+
+def canonicalize_link(link: str) -> str:
+    """
+    Canonical form of a job posting URL, used as the stored link and dedup key.
+
+    Lowercases scheme and host, drops fragments, tracking parameters and trailing
+    slashes, and applies per-ATS rules so the same Greenhouse/Lever/Comeet/Workday
+    posting maps to one URL whatever locale path or query string it came with.
+    """
+    parts = urlsplit(link.strip())
+    hostname = host = parts.hostname or ""
+    path = _REPEATED_SLASHES.sub("/", parts.path)
+    query = {
+        name: value
+        for name, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not _TRACKING_PARAMS.match(name)
+    }
+    for suffix, rule in _HOST_RULES:
+        if host == suffix or host.endswith("." + suffix):
+            host, path, query = rule(host, path, query)
+            break
+    if len(path) > 1:
+        path = path.rstrip("/")
+    scheme = parts.scheme.lower()
+    if parts.port and host == hostname:
+        host = f"{host}:{parts.port}"
+    elif host != hostname:
+        scheme = "https"  # Rewritten to the ATS's public host
+    return urlunsplit((scheme, host, path or "/", urlencode(sorted(query.items())), ""))
+
+
+def posting_site(link: str) -> str:
+    """
+    The ATS a job link is on (`greenhouse`, `lever`, `comeet`, `workday`), or its
+    bare host for any other site.
+
+    Every company's board on one ATS shares that ATS's templates, so generic
+    postings there can look alike while being different jobs: near-duplicate
+    matching only merges links from different sites (the same posting on
+    another ATS, or on the company's own careers page).
+    """
+    host = urlsplit(canonicalize_link(link)).hostname or ""
+    for suffix, rule in _HOST_RULES:
+        if host == suffix or host.endswith("." + suffix):
+            return rule.__name__.lstrip("_")
+    return host
@@ -1,27 +1,141 @@
-from pydantic_settings import BaseSettings
-from pydantic import PostgresDsn
-
-
-class Settings(BaseSettings):
-    DEBUG: bool = True
-    
-    REDIS_URL: str = "redis://localhost:6379"
-    POSTGRES_URL: PostgresDsn
-    GOOGLE_API_KEY: str
-    GOOGLE_SEARCH_ENGINE_ID: str
-    CLIENT_ID: str = "job-scraper"
-    REDIS_EXPIRATION: int = 14400
-    SCRAPER_API_KEY  : str = "your_scraper_api_key"
-    @property
-    def REDIS_HOST(self):
-        return self.REDIS_URL.split("//")[-1].split(":")[0]
-
-    @property
-    def REDIS_PORT(self):
-        return int(self.REDIS_URL.split(":")[-1])
-
-    class Config:
-        env_file = ".env"
-
-
-settings = Settings()
+from pydantic_settings import BaseSettings
+from pydantic import PostgresDsn
+
+
+class Settings(BaseSettings):
+    DEBUG: bool = True
+    DEBUGPY_ENABLED: bool = False  # Listen for a debugpy client (opt-in)
+    DEBUGPY_WAIT: bool = False  # Block start-up until the debugger attaches
+    DEBUGPY_PORT: int = 5678
+
+    # Logging
+    LOG_FILE: str = "logs/job_scraper.log"  # Rotating log file; empty logs to stdout only
+    LOG_LEVEL: str = "INFO"  # Console
+    LOG_FILE_LEVEL: str = "INFO"
+    LOG_JSON: bool = False  # One JSON object per line, with bound fields (e.g. keyword)
+    LOG_QUEUE_SIZE: int = 10_000  # Console records buffered for the writer thread; 0 writes inline
+    LOG_SAMPLE_EVERY: int = 100  # Log 1 in N per-item messages (1 logs all, 0 none)
+    LOG_SAMPLE_MAX_PER_SECOND: float = 10.0  # Per event, after sampling; 0 for no cap
+    
+    REDIS_URL: str = "redis://localhost:6379"
+    POSTGRES_URL: PostgresDsn
+    GOOGLE_API_KEY: str
+    GOOGLE_SEARCH_ENGINE_ID: str
+    CLIENT_ID: str = "job-scraper"
+    REDIS_EXPIRATION: int = 14400
+    SCRAPER_API_KEY  : str = "your_scraper_api_key"
+
+    # Connection pools
+    DB_ECHO: bool = False  # Log every SQL statement (debugging only)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    REDIS_MAX_CONNECTIONS: int = 50
+    HTTP_POOL_CONNECTIONS: int = 10
+    HTTP_POOL_MAXSIZE: int = 20
+
+    # Async search fan-out
+    SEARCH_MAX_CONCURRENCY: int = 8  # Max in-flight Custom Search requests
+    SEARCH_RATE_PER_SECOND: float = 5.0  # Token-bucket refill rate
+    SEARCH_RATE_BURST: int = 10  # Token-bucket capacity
+    SEARCH_HTTP_TIMEOUT: float = 10.0
+
+    # Custom Search failure handling
+    SEARCH_MAX_RETRIES: int = 3  # Per page, for rate limits, 5xx and network errors
+    SEARCH_BACKOFF_BASE: float = 1.0  # Seconds; doubles per attempt, full jitter
+    SEARCH_BACKOFF_MAX: float = 60.0  # Longer Retry-After waits re-queue the keywords instead
+    SEARCH_DAILY_QUOTA: int = 10_000  # Calls per Pacific day across all workers; 0 = unmetered
+    SEARCH_BREAKER_THRESHOLD: int = 5  # Failures in a row that open the circuit
+    SEARCH_BREAKER_COOLDOWN: float = 120.0  # Seconds the circuit stays open before a probe
+
+    # Job sources, run concurrently per scrape; on a shared link the first listed wins
+    SCRAPE_SOURCES: list[str] = ["greenhouse", "lever", "google"]
+    GREENHOUSE_BOARDS: list[str] = []  # Board tokens (boards.greenhouse.io/<token>)
+    LEVER_COMPANIES: list[str] = []  # Company slugs (jobs.lever.co/<company>)
+    GREENHOUSE_RATE_PER_SECOND: float = 2.0
+    LEVER_RATE_PER_SECOND: float = 2.0
+    BOARD_MAX_CONCURRENCY: int = 4  # Per board source
+    BOARD_HTTP_TIMEOUT: float = 20.0  # Full listings can be large
+
+    # Multi-keyword query packing
+    SEARCH_MAX_QUERY_LENGTH: int = 1800  # URL-encoded `q` length budget per packed query
+    SEARCH_MAX_KEYWORDS_PER_QUERY: int = 8
+    SEARCH_RESULTS_PER_KEYWORD: int = 20  # Per keyword; packed queries add theirs up (max 100)
+
+    # Incremental crawl
+    SEARCH_INCREMENTAL: bool = True  # Stop paging at the first page of known links
+    SEARCH_INCREMENTAL_MAX_DAYS: int = 14  # Older high-water marks trigger a full crawl
+
+    # Dedup index (Bloom filter over job_posts.link)
+    DEDUP_EXPECTED_LINKS: int = 1_000_000
+    DEDUP_FALSE_POSITIVE_RATE: float = 0.01
+
+    # Near-duplicate detection (MinHash over title + snippet)
+    NEAR_DUP_THRESHOLD: float = 0.8  # Estimated Jaccard similarity to merge two postings
+    NEAR_DUP_NUM_PERM: int = 128
+    NEAR_DUP_BANDS: int = 16
+
+    # Custom Search page cache
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_TTL: int = 14400  # Seconds a cached page stays valid
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Compressed size before LRU eviction
+
+    # Retention: expired posts move from job_posts to the monthly-partitioned archive
+    RETENTION_ENABLED: bool = True  # The worker pool also runs the retention task
+    RETENTION_DAYS: int = 90  # Posts not found by any scrape for this long are archived
+    LAST_SEEN_REFRESH: float = 86400  # Seconds before a re-found post's last_seen_at is rewritten
+    RETENTION_BATCH_SIZE: int = 5000  # Rows moved per statement (and transaction)
+    RETENTION_INTERVAL: float = 6 * 3600  # Seconds between retention runs
+    COMPACT_REINDEX_RATIO: float = 0.2  # Rebuild hot indexes once this share was moved
+    ARCHIVE_EXPORT_DIR: str = ""  # Old archive months go here as gzip NDJSON; empty keeps all
+    ARCHIVE_KEEP_MONTHS: int = 12  # Archive months kept in the database before export
+
+    UPSERT_BATCH_SIZE: int = 1000  # Rows per INSERT ... ON CONFLICT statement
+    EXPORT_BATCH_SIZE: int = 5000  # Rows fetched per server-side cursor round trip
+
+    # Background scrape queue
+    SCRAPE_WORKER_PROCESSES: int = 2
+    SCRAPE_JOB_TTL: int = 86400  # How long job status stays pollable (seconds)
+    SCRAPE_INFLIGHT_TTL: int = 3600  # Safety expiry for keyword coalescing claims
+    SCRAPE_EVENTS_POLL_INTERVAL: float = 0.5
+    SCRAPE_LEASE_TTL_MS: int = 120_000  # Keyword scrape lease, renewed while the scrape runs
+    SCRAPE_REQUEUE_DELAY: float = 300.0  # First retry of keywords whose search failed; doubles
+    SCRAPE_MAX_REQUEUES: int = 3
+
+    # Scheduled scraping
+    SCHEDULER_ENABLED: bool = True  # The worker pool also runs a scheduler process
+    SCHEDULE_TICK_SECONDS: float = 30.0
+    SCHEDULE_QUOTA_SHARE: float = 0.8  # Of SEARCH_DAILY_QUOTA; the rest is for on-demand scrapes
+    SCHEDULE_MIN_INTERVAL: int = 6 * 3600  # Keep above REDIS_EXPIRATION
+    SCHEDULE_MAX_INTERVAL: int = 7 * 86400
+    SCHEDULE_CLAIM_TTL: int = 3600  # A claimed keyword is due again if its run never reports
+    SCHEDULE_BATCH_SIZE: int = 8  # Keywords claimed per tick, packed into one scrape job
+
+    # Job detail enrichment
+    ENRICH_AFTER_SCRAPE: bool = True  # Workers enrich pending rows after each scrape job
+    ENRICH_BATCH_LIMIT: int = 500  # Rows enriched per run
+    ENRICH_MAX_CONCURRENCY: int = 16
+    ENRICH_PER_HOST_CONCURRENCY: int = 4  # Per ATS host, to stay polite
+    ENRICH_HTTP_TIMEOUT: float = 15.0
+    ENRICH_CACHE_TTL: int = 7 * 86400  # Parsed pages kept for conditional refetches
+    ENRICH_MAX_ATTEMPTS: int = 5  # Failed fetches before a row is marked enriched without details
+    ENRICH_RETRY_DELAY: float = 3600.0  # Seconds before retrying a failed fetch; doubles
+
+    # Metrics and profiling
+    PROFILE_STAGES: bool = False  # Log a per-request stage timing breakdown
+    WORKER_METRICS_PORT: int = 9100  # 0 disables the worker's metrics endpoint
+
+    @property
+    def REDIS_HOST(self):
+        return self.REDIS_URL.split("//")[-1].split(":")[0]
+
+    @property
+    def REDIS_PORT(self):
+        return int(self.REDIS_URL.split(":")[-1])
+
+    class Config:
+        env_file = ".env"
+
+
+settings = Settings()
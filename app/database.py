@@ -1,16 +1,55 @@
+from contextlib import contextmanager
+
 from sqlalchemy.orm import declarative_base
 
 # Base = declarative_base()
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import settings
+from app.metrics import instrument_engine
 
 Base = declarative_base()
-# engine = create_engine(settings.POSTGRES_URL)
-engine = create_engine(str(settings.POSTGRES_URL), echo=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Created on first use, so importing the app does not build the engine or load the driver
+_engine: Engine | None = None
+_sessionmaker: sessionmaker | None = None
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            str(settings.POSTGRES_URL),
+            echo=settings.DB_ECHO,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+        instrument_engine(_engine)
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Close the engine's pooled connections, if it was ever created."""
+    if _engine is not None:
+        _engine.dispose()
+
+
+def SessionLocal() -> Session:  # noqa: N802 - stands in for the former sessionmaker
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _sessionmaker()
+
+
+def __getattr__(name: str):
+    # `from app.database import engine` keeps working, creating the engine then
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_db():
@@ -19,3 +58,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def session_scope():
+    """Session for non-request code (workers, scripts); always closed on exit."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
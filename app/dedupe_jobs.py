@@ -0,0 +1,135 @@
+"""
+Offline dedupe of the job_posts table.
+
+    python -m app.dedupe_jobs [--dry-run]
+
+Rows whose links canonicalize to the same URL, or whose title+snippet are
+near-duplicates on different sites (the same posting listed on another ATS or
+on the company's own page; two links on one ATS are two jobs), are merged onto
+the oldest row of their group: it keeps the union of the keywords and the canonical link, and the
+other rows are deleted.
+"""
+
+import argparse
+
+from sqlalchemy import delete, select, update
+
+from app.canonicalize import canonicalize_link, posting_site
+from app.database import session_scope
+from app.log_config import logger
+from app.models.JobPost import JobPost
+from app.near_duplicates import NearDuplicateDetector
+
+_STREAM_BATCH = 10000
+_WRITE_BATCH = 1000
+
+
+def _load(db) -> tuple[list[int], list[str], list[str], dict[int, list[str]], set[int]]:
+    ids, links, texts, keywords, non_canonical = [], [], [], {}, set()
+    stmt = select(
+        JobPost.id, JobPost.link, JobPost.title, JobPost.snippet, JobPost.keywords
+    ).order_by(JobPost.id)
+    for partition in db.execute(stmt.execution_options(yield_per=_STREAM_BATCH)).partitions():
+        for row in partition:
+            link = canonicalize_link(row.link) if row.link else ""
+            if link != (row.link or ""):
+                non_canonical.add(row.id)
+            ids.append(row.id)
+            links.append(link)
+            texts.append(NearDuplicateDetector.text_of(row.title, row.snippet))
+            keywords[row.id] = row.keywords or []
+    return ids, links, texts, keywords, non_canonical
+
+
+def find_groups(ids: list[int], links: list[str], texts: list[str]) -> list[list[int]]:
+    """Union of canonical-link groups and near-duplicate clusters, oldest id first."""
+    parent = {row_id: row_id for row_id in ids}
+
+    def find(row_id: int) -> int:
+        while parent[row_id] != row_id:
+            parent[row_id] = parent[parent[row_id]]
+            row_id = parent[row_id]
+        return row_id
+
+    def union(a: int, b: int) -> None:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    first_with_link: dict[str, int] = {}
+    for row_id, link in zip(ids, links):
+        if link:
+            union(first_with_link.setdefault(link, row_id), row_id)
+    # Near-duplicates among distinct postings only (one row per canonical link),
+    # never two from the same ATS or site
+    distinct = [
+        i
+        for i, (row_id, link) in enumerate(zip(ids, links))
+        if not link or first_with_link[link] == row_id
+    ]
+    sites = [posting_site(links[i]) if links[i] else f"#{ids[i]}" for i in distinct]
+    clusters = NearDuplicateDetector().clusters(
+        [ids[i] for i in distinct], [texts[i] for i in distinct], sites
+    )
+    link_of = dict(zip(ids, links))
+    for cluster in clusters:
+        logger.info(f"🔗 Near-duplicates: {[link_of[row_id] for row_id in cluster]}")
+        for row_id in cluster[1:]:
+            union(cluster[0], row_id)
+
+    groups: dict[int, list[int]] = {}
+    for row_id in ids:
+        groups.setdefault(find(row_id), []).append(row_id)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+def dedupe(db, dry_run: bool = False) -> dict:
+    ids, links, texts, keywords, non_canonical = _load(db)
+    link_of = dict(zip(ids, links))
+    groups = find_groups(ids, links, texts)
+    duplicates = [row_id for group in groups for row_id in group[1:]]
+    logger.info(f"Dedupe: {len(ids)} rows, {len(groups)} groups, {len(duplicates)} duplicates")
+
+    # Survivors take the merged keywords and the canonical link of their group
+    updates = []
+    for group in groups:
+        merged = list(dict.fromkeys(kw for row_id in group for kw in keywords[row_id]))
+        updates.append({"id": group[0], "keywords": merged, "link": link_of[group[0]]})
+    grouped = {row_id for group in groups for row_id in group}
+    canonical_only = [
+        {"id": row_id, "link": link_of[row_id]}
+        for row_id in sorted(non_canonical - grouped)
+        if link_of[row_id]
+    ]
+    summary = {
+        "rows": len(ids),
+        "groups": len(groups),
+        "deleted": len(duplicates),
+        "links_canonicalized": len(canonical_only),
+    }
+    if dry_run:
+        return summary
+
+    for offset in range(0, len(duplicates), _WRITE_BATCH):
+        db.execute(
+            delete(JobPost).where(JobPost.id.in_(duplicates[offset : offset + _WRITE_BATCH]))
+        )
+    # Deletes go first so a survivor can take over a link a deleted row held
+    for offset in range(0, len(updates), _WRITE_BATCH):
+        db.execute(update(JobPost), updates[offset : offset + _WRITE_BATCH])
+    for offset in range(0, len(canonical_only), _WRITE_BATCH):
+        db.execute(update(JobPost), canonical_only[offset : offset + _WRITE_BATCH])
+    db.commit()
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Merge duplicate job posts.")
+    parser.add_argument("--dry-run", action="store_true", help="Report groups without writing")
+    args = parser.parse_args()
+    with session_scope() as db:
+        logger.info(f"Dedupe finished: {dedupe(db, dry_run=args.dry_run)}")
+
+
+if __name__ == "__main__":
+    main()
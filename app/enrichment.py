@@ -0,0 +1,469 @@
+"""
+Job detail enrichment: fills description, requirements, responsibilities,
+company, location and posted_time for stored job posts.
+
+    python -m app.enrichment [--limit 500]
+
+Greenhouse and Lever postings are read from their public JSON APIs; any other
+ATS page is fetched as HTML and parsed from its schema.org JobPosting JSON-LD.
+Runs as its own stage over rows not enriched yet, after scraping.
+"""
+
+import argparse
+import asyncio
+import datetime
+import hashlib
+import html
+import json
+import re
+import zlib
+from dataclasses import asdict, dataclass
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import or_, select, update
+
+from app.config import settings
+from app.database import session_scope
+from app.geo import default_matcher
+from app.log_config import logger
+from app.models.JobPost import JobPost
+from app.redis_service import RedisService
+
+GREENHOUSE_API = "https://boards-api.greenhouse.io/v1/boards"
+LEVER_API = "https://api.lever.co/v0/postings"
+
+_GREENHOUSE_LINK = re.compile(r"^https?://boards\.greenhouse\.io/([^/]+)/jobs/(\d+)")
+_LEVER_LINK = re.compile(r"^https?://jobs\.lever\.co/([^/]+)/([0-9a-f-]{36})")
+_JSON_LD = re.compile(
+    r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+_REQUIREMENTS_HEADING = re.compile(
+    r"requirement|qualification|what you.{0,10}bring|looking for|about you|you have|skills",
+    re.IGNORECASE,
+)
+_RESPONSIBILITIES_HEADING = re.compile(
+    r"responsibilit|what you.{0,10}do|the role|your role|duties|day.to.day", re.IGNORECASE
+)
+_BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "br", "section", "tr", "h1", "h2", "h3", "h4", "h5"}
+_EMPHASIS_TAGS = {"strong", "b", "h1", "h2", "h3", "h4", "h5"}
+_CACHE_KEY = "enrich:page:{}"
+
+
+@dataclass
+class JobDetails:
+    description: str | None = None
+    requirements: str | None = None
+    responsibilities: str | None = None
+    company: str | None = None
+    location: str | None = None
+    posted_time: datetime.datetime | None = None
+
+    def as_row(self) -> dict:
+        """Column values for the fields that were found (missing ones stay untouched)."""
+        return {name: value for name, value in asdict(self).items() if value}
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        if self.posted_time:
+            data["posted_time"] = self.posted_time.isoformat()
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "JobDetails":
+        if data.get("posted_time"):
+            data = {**data, "posted_time": datetime.datetime.fromisoformat(data["posted_time"])}
+        return cls(**data)
+
+
+class _BlockParser(HTMLParser):
+    """Splits HTML into text blocks, flagging blocks that are entirely bold or a heading."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[tuple[str, bool]] = []
+        self._text: list[str] = []
+        self._emphasized: list[str] = []
+        self._emphasis_depth = 0
+        self._in_list_item = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self._flush()
+            self._in_list_item = tag == "li"
+        if tag in _EMPHASIS_TAGS:
+            self._emphasis_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _EMPHASIS_TAGS:
+            self._emphasis_depth = max(0, self._emphasis_depth - 1)
+        if tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        self._text.append(data)
+        if self._emphasis_depth:
+            self._emphasized.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        text = " ".join("".join(self._text).split())
+        emphasized = " ".join("".join(self._emphasized).split())
+        if text:
+            is_heading = text == emphasized and len(text) <= 80
+            self.blocks.append((f"- {text}" if self._in_list_item else text, is_heading))
+        self._text, self._emphasized = [], []
+        self._in_list_item = False
+
+
+def _section_of(heading: str) -> str | None:
+    if _RESPONSIBILITIES_HEADING.search(heading):
+        return "responsibilities"
+    if _REQUIREMENTS_HEADING.search(heading):
+        return "requirements"
+    return None
+
+
+def split_sections(markup: str) -> tuple[str | None, str | None, str | None]:
+    """
+    Plain text of a posting body plus its requirements and responsibilities sections.
+
+    Sections are recognised by their (bold or heading) titles and run until the
+    next title.
+
+    Returns:
+        Tuple[Optional[str], Optional[str], Optional[str]]: description, requirements
+        and responsibilities text.
+    """
+    parser = _BlockParser()
+    parser.feed(markup)
+    parser.close()
+    lines: list[str] = []
+    sections: dict[str, list[str]] = {"requirements": [], "responsibilities": []}
+    current = None
+    for text, is_heading in parser.blocks:
+        lines.append(text)
+        if is_heading:
+            current = _section_of(text)
+        elif current:
+            sections[current].append(text)
+    return (
+        "\n".join(lines) or None,
+        "\n".join(sections["requirements"]) or None,
+        "\n".join(sections["responsibilities"]) or None,
+    )
+
+
+def _parse_time(value) -> datetime.datetime | None:
+    """ISO-8601 string or epoch milliseconds, as naive UTC."""
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            parsed = datetime.datetime.fromtimestamp(value / 1000, datetime.timezone.utc)
+        else:
+            parsed = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_greenhouse(data: dict) -> JobDetails:
+    description, requirements, responsibilities = split_sections(
+        html.unescape(data.get("content") or "")
+    )
+    return JobDetails(
+        description=description,
+        requirements=requirements,
+        responsibilities=responsibilities,
+        company=data.get("company_name"),
+        location=(data.get("location") or {}).get("name"),
+        posted_time=_parse_time(data.get("first_published") or data.get("updated_at")),
+    )
+
+
+def parse_lever(data: dict) -> JobDetails:
+    parts = [data.get("descriptionPlain") or ""]
+    sections: dict[str, list[str]] = {"requirements": [], "responsibilities": []}
+    for item in data.get("lists") or []:
+        text = split_sections(item.get("content") or "")[0] or ""
+        parts.extend([item.get("text") or "", text])
+        section = _section_of(item.get("text") or "")
+        if section:
+            sections[section].append(text)
+    parts.append(data.get("additionalPlain") or "")
+    return JobDetails(
+        description="\n".join(part.strip() for part in parts if part.strip()) or None,
+        requirements="\n".join(sections["requirements"]) or None,
+        responsibilities="\n".join(sections["responsibilities"]) or None,
+        location=(data.get("categories") or {}).get("location"),
+        posted_time=_parse_time(data.get("createdAt")),
+    )
+
+
+def _job_postings(node):
+    if isinstance(node, list):
+        for child in node:
+            yield from _job_postings(child)
+    elif isinstance(node, dict):
+        if node.get("@type") == "JobPosting":
+            yield node
+        yield from _job_postings(node.get("@graph", []))
+
+
+def parse_json_ld(page: str) -> JobDetails | None:
+    """Details from the first schema.org JobPosting embedded in an HTML page."""
+    for script in _JSON_LD.findall(page):
+        try:
+            data = json.loads(script.strip())
+        except ValueError:
+            continue
+        for posting in _job_postings(data):
+            description, requirements, responsibilities = split_sections(
+                html.unescape(posting.get("description") or "")
+            )
+            organization = posting.get("hiringOrganization")
+            if isinstance(organization, dict):
+                organization = organization.get("name")
+            places = posting.get("jobLocation") or []
+            place = (places[0] if isinstance(places, list) and places else places) or {}
+            address = (place.get("address") or {}) if isinstance(place, dict) else {}
+            if isinstance(address, dict):
+                country = address.get("addressCountry")
+                if isinstance(country, dict):
+                    country = country.get("name")
+                location = ", ".join(
+                    part for part in (address.get("addressLocality"), country) if part
+                )
+            else:
+                location = str(address)
+            return JobDetails(
+                description=description,
+                requirements=requirements,
+                responsibilities=responsibilities,
+                company=organization,
+                location=location or None,
+                posted_time=_parse_time(posting.get("datePosted")),
+            )
+    return None
+
+
+class DetailCache:
+    """
+    Redis cache of parsed posting pages with the validators they were served with.
+
+    Lets a refetch send If-None-Match / If-Modified-Since and reuse the parsed
+    details on a 304 instead of downloading and parsing the page again.
+    """
+
+    def __init__(self, client, ttl: int = settings.ENRICH_CACHE_TTL):
+        self.client = client  # Binary client: values are compressed
+        self.ttl = ttl
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        return _CACHE_KEY.format(hashlib.sha1(url.encode()).hexdigest())
+
+    def get(self, url: str) -> dict | None:
+        blob = self.client.get(self.cache_key(url))
+        return json.loads(zlib.decompress(blob)) if blob is not None else None
+
+    def set(self, url: str, entry: dict) -> None:
+        blob = zlib.compress(json.dumps(entry, separators=(",", ":")).encode())
+        self.client.set(self.cache_key(url), blob, ex=self.ttl)
+
+    def touch(self, url: str) -> None:
+        self.client.expire(self.cache_key(url), self.ttl)
+
+
+class JobDetailFetcher:
+    """
+    Fetches and parses posting details with global and per-host concurrency caps.
+
+    `api_bases` overrides the Greenhouse/Lever API roots, e.g. to point at a
+    local fixture server.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: DetailCache | None = None,
+        max_concurrency: int = settings.ENRICH_MAX_CONCURRENCY,
+        per_host: int = settings.ENRICH_PER_HOST_CONCURRENCY,
+        api_bases: dict[str, str] | None = None,
+    ):
+        self.client = client
+        self.cache = cache
+        self.per_host = per_host
+        self.api_bases = {"greenhouse": GREENHOUSE_API, "lever": LEVER_API, **(api_bases or {})}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.stats = {"fetched": 0, "not_modified": 0, "not_found": 0, "failed": 0}
+
+    def source_for(self, link: str) -> tuple[str, str]:
+        """URL to fetch for a job link and the kind of document it returns."""
+        match = _GREENHOUSE_LINK.match(link)
+        if match:
+            return f"{self.api_bases['greenhouse']}/{match.group(1)}/jobs/{match.group(2)}", "gh"
+        match = _LEVER_LINK.match(link)
+        if match:
+            return f"{self.api_bases['lever']}/{match.group(1)}/{match.group(2)}", "lever"
+        return link, "html"
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._host_semaphores[host]
+
+    async def fetch(self, link: str) -> JobDetails | None:
+        """
+        Details for one posting, or None when the posting is gone or has none.
+
+        Raises:
+            httpx.HTTPError: On network errors and unexpected statuses (retry later).
+        """
+        url, kind = self.source_for(link)
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        async with self._semaphore, self._host_semaphore(url):
+            response = await self.client.get(url, headers=headers, follow_redirects=True)
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            self.cache.touch(url)
+            return JobDetails.from_json(cached["details"]) if cached["details"] else None
+        if response.status_code in (404, 410):
+            self.stats["not_found"] += 1
+            return None
+        response.raise_for_status()
+        self.stats["fetched"] += 1
+        if kind == "gh":
+            details = parse_greenhouse(response.json())
+        elif kind == "lever":
+            details = parse_lever(response.json())
+        else:
+            details = parse_json_ld(response.text)
+        if self.cache:
+            self.cache.set(
+                url,
+                {
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "details": details.to_json() if details else None,
+                },
+            )
+        return details
+
+    async def fetch_many(self, links: list[str]) -> list[JobDetails | None | Exception]:
+        """Fetch all links concurrently; failures come back as exceptions, in order."""
+
+        async def guarded(link: str):
+            try:
+                return await self.fetch(link)
+            except (httpx.HTTPError, ValueError) as e:
+                self.stats["failed"] += 1
+                logger.warning(f"Enrichment fetch failed for {link}: {e}")
+                return e
+
+        return await asyncio.gather(*(guarded(link) for link in links))
+
+
+async def _fetch_details(links: list[str], cache, api_bases) -> tuple[list, dict]:
+    limits = httpx.Limits(max_connections=settings.ENRICH_MAX_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=settings.ENRICH_HTTP_TIMEOUT, limits=limits) as client:
+        fetcher = JobDetailFetcher(client, cache=cache, api_bases=api_bases)
+        return await fetcher.fetch_many(links), fetcher.stats
+
+
+def enrich_pending(
+    db,
+    cache: DetailCache | None = None,
+    limit: int = settings.ENRICH_BATCH_LIMIT,
+    api_bases: dict[str, str] | None = None,
+) -> dict:
+    """
+    Enrich up to `limit` job posts that were never enriched, newest first.
+
+    Rows are updated in batches by primary key. A location is only filled in
+    where the row has none, as the geo tagger's place name (the raw ATS text when
+    it names no Israeli place), so `/jobs?location=` keeps matching. Postings that
+    are gone or carry no details are marked enriched too. Rows whose fetch failed
+    are retried after ENRICH_RETRY_DELAY, doubling per failure, and marked enriched
+    without details after ENRICH_MAX_ATTEMPTS failures, so a host that keeps
+    refusing is not hit again on every run.
+
+    Returns:
+        Dict[str, int]: `selected` and `updated` row counts plus the fetcher stats.
+    """
+    now = datetime.datetime.utcnow()
+    rows = db.execute(
+        select(JobPost.id, JobPost.link, JobPost.location, JobPost.enrich_attempts)
+        .where(
+            JobPost.enriched_at.is_(None),
+            JobPost.link.isnot(None),
+            or_(JobPost.enrich_retry_at.is_(None), JobPost.enrich_retry_at <= now),
+        )
+        .order_by(JobPost.id.desc())
+        .limit(limit)
+    ).all()
+    if not rows:
+        return {"selected": 0, "updated": 0}
+    outcomes, stats = asyncio.run(_fetch_details([row.link for row in rows], cache, api_bases))
+
+    enriched_at = datetime.datetime.utcnow()
+    updates, failures = [], []
+    for row, details in zip(rows, outcomes):
+        if isinstance(details, Exception):
+            attempts = row.enrich_attempts + 1
+            failure = {"id": row.id, "enrich_attempts": attempts}
+            if attempts >= settings.ENRICH_MAX_ATTEMPTS:
+                failure["enriched_at"] = enriched_at  # Given up: no details
+            else:
+                delay = settings.ENRICH_RETRY_DELAY * 2 ** (attempts - 1)
+                failure["enrich_retry_at"] = enriched_at + datetime.timedelta(seconds=delay)
+            failures.append(failure)
+            continue
+        values = details.as_row() if details else {}
+        if "location" in values:
+            if row.location:
+                del values["location"]
+            else:
+                geo = default_matcher().classify(values["location"])
+                values["location"] = geo.location or values["location"]
+        updates.append({"id": row.id, "enriched_at": enriched_at, **values})
+    writes = updates + failures
+    for offset in range(0, len(writes), settings.UPSERT_BATCH_SIZE):
+        db.execute(update(JobPost), writes[offset : offset + settings.UPSERT_BATCH_SIZE])
+        db.commit()
+    summary = {
+        "selected": len(rows),
+        "updated": len(updates),
+        "gave_up": sum("enriched_at" in failure for failure in failures),
+        **stats,
+    }
+    logger.info(f"Enrichment run: {summary}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fetch details for job posts.")
+    parser.add_argument("--limit", type=int, default=settings.ENRICH_BATCH_LIMIT)
+    args = parser.parse_args()
+    with session_scope() as db:
+        enrich_pending(db, cache=DetailCache(RedisService().get_raw_client()), limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Local location classification of search results.
+
+    python -m app.geo --backfill
+
+Finds Israeli cities (English, transliterated and Hebrew spellings) and
+off-target foreign places in a result's title/snippet with one precompiled
+regex. The alias gazetteer is compiled into a trie-shaped pattern, so the
+matcher does not retry every alias at every position. Results naming only
+foreign places are filtered out; the rest are tagged with the city found
+(or "Israel"), which lets the Custom Search query name just a few places.
+"""
+
+import argparse
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import session_scope
+from app.log_config import logger
+from app.models.JobPost import JobPost
+
+COUNTRY = "Israel"
+
+# Canonical city -> spellings seen in postings
+ISRAELI_PLACES = {
+    "Tel Aviv": ["Tel Aviv", "Tel Aviv-Yafo", "Tel Aviv-Jaffa", "TLV", "Jaffa", "Yafo",
+                 "תל אביב", "תל אביב-יפו", "יפו"],
+    "Jerusalem": ["Jerusalem", "Yerushalayim", "Al-Quds", "ירושלים"],
+    "Haifa": ["Haifa", "Hefa", "MATAM", "חיפה"],
+    "Herzliya": ["Herzliya", "Herzlia", "Hertzliya", "Herzliyya", "Herzliya Pituach",
+                 "הרצליה", "הרצליה פיתוח"],
+    "Ramat Gan": ["Ramat Gan", "Ramat-Gan", "רמת גן"],
+    "Petah Tikva": ["Petah Tikva", "Petach Tikva", "Petah Tiqva", "Petach Tikvah",
+                    "Petah Tikvah", "פתח תקווה", "פתח תקוה"],
+    "Rishon LeZion": ["Rishon LeZion", "Rishon Lezion", "Rishon LeTsiyon", "Rishon Le Zion",
+                      "ראשון לציון"],
+    "Netanya": ["Netanya", "Natanya", "Netania", "נתניה"],
+    "Ra'anana": ["Ra'anana", "Raanana", "Ra’anana", "רעננה"],
+    "Kfar Saba": ["Kfar Saba", "Kfar Sava", "כפר סבא"],
+    "Hod HaSharon": ["Hod HaSharon", "Hod Hasharon", "הוד השרון"],
+    "Rehovot": ["Rehovot", "Rechovot", "רחובות"],
+    "Ness Ziona": ["Ness Ziona", "Nes Ziona", "Nes Tziona", "נס ציונה"],
+    "Yavne": ["Yavne", "Yavneh", "יבנה"],
+    "Modi'in": ["Modi'in", "Modiin", "Modi’in", "Modiin-Maccabim-Re'ut", "מודיעין"],
+    "Be'er Sheva": ["Be'er Sheva", "Beer Sheva", "Beersheba", "Beer-Sheva", "Be’er Sheva",
+                    "באר שבע"],
+    "Holon": ["Holon", "חולון"],
+    "Bat Yam": ["Bat Yam", "בת ים"],
+    "Bnei Brak": ["Bnei Brak", "Bnei Berak", "בני ברק"],
+    "Givatayim": ["Givatayim", "Givataim", "גבעתיים"],
+    "Or Yehuda": ["Or Yehuda", "אור יהודה"],
+    "Airport City": ["Airport City", "קריית שדה התעופה"],
+    "Rosh HaAyin": ["Rosh HaAyin", "Rosh Ha'Ayin", "Rosh Haayin", "ראש העין"],
+    "Lod": ["Lod", "לוד"],
+    "Ramla": ["Ramla", "Ramle", "רמלה"],
+    "Ashdod": ["Ashdod", "אשדוד"],
+    "Ashkelon": ["Ashkelon", "Ashqelon", "אשקלון"],
+    "Kiryat Gat": ["Kiryat Gat", "Qiryat Gat", "קריית גת"],
+    "Sderot": ["Sderot", "שדרות"],
+    "Eilat": ["Eilat", "Elat", "אילת"],
+    "Hadera": ["Hadera", "חדרה"],
+    "Caesarea": ["Caesarea", "Caesaria", "Qesarya", "קיסריה"],
+    "Yokneam": ["Yokneam", "Yoqneam", "Yokneam Illit", "Yokneam Ilit",
+                "יקנעם", "יקנעם עילית"],
+    "Migdal HaEmek": ["Migdal HaEmek", "Migdal Haemek", "מגדל העמק"],
+    "Nazareth": ["Nazareth", "Nazrat Illit", "Nof HaGalil", "נצרת", "נוף הגליל"],
+    "Afula": ["Afula", "עפולה"],
+    "Tiberias": ["Tiberias", "Tveria", "טבריה"],
+    "Safed": ["Safed", "Tzfat", "Zefat", "צפת"],
+    "Karmiel": ["Karmiel", "Carmiel", "כרמיאל"],
+    "Kiryat Shmona": ["Kiryat Shmona", "Qiryat Shemona", "קריית שמונה"],
+    "Akko": ["Akko", "Acco", "עכו"],
+    "Nahariya": ["Nahariya", "Naharia", "נהריה"],
+    "Kiryat Ata": ["Kiryat Ata", "קריית אתא"],
+    "Kiryat Bialik": ["Kiryat Bialik", "קריית ביאליק"],
+    "Kiryat Motzkin": ["Kiryat Motzkin", "קריית מוצקין"],
+    "Kiryat Yam": ["Kiryat Yam", "קריית ים"],
+    "Kiryat Tivon": ["Kiryat Tivon", "Qiryat Tivon", "קריית טבעון"],
+    "Kiryat Malachi": ["Kiryat Malachi", "Kiryat Mal'akhi", "קריית מלאכי"],
+    "Nesher": ["Nesher", "נשר"],
+}  # fmt: skip
+COUNTRY_ALIASES = ["Israel", "ישראל"]
+
+# Places that put a result off target unless Israel or an Israeli city is named too
+FOREIGN_PLACES = [
+    "Italy", "Rome", "Milan", "United States", "USA", "New York", "San Francisco",
+    "Boston", "Seattle", "United Kingdom", "UK", "London", "Manchester",
+    "Ireland", "Dublin", "Germany", "Berlin", "Munich", "France", "Paris", "Spain",
+    "Madrid", "Barcelona", "Portugal", "Lisbon", "Netherlands", "Amsterdam", "Poland",
+    "Warsaw", "Krakow", "Ukraine", "Kyiv", "Kiev", "Romania", "Bucharest", "Cyprus",
+    "Limassol", "Bulgaria", "Greece", "Athens", "India", "Bangalore",
+    "Bengaluru", "Hyderabad", "Pune", "Singapore", "Canada", "Toronto", "Vancouver",
+    "Australia", "Sydney", "Brazil", "Mexico", "Argentina", "Japan", "Tokyo",
+]  # fmt: skip
+
+_SEPARATORS = "-‐–'’`׳\"״ "
+_HEBREW_PREFIXES = "ובכלמהש"  # Prepositions and articles written onto the next word
+_FOREIGN = ""  # Gazetteer value of foreign places
+# How Custom Search labels some Italian listings; not a mention of Israel
+_ITALIAN_LABEL = re.compile(r"\bisrael\s*,\s*italy\b", re.IGNORECASE)
+
+
+@dataclass(slots=True, frozen=True)
+class GeoMatch:
+    location: str | None  # Israeli city named first, else COUNTRY, else None
+    on_target: bool  # False when foreign places are named and Israel is not
+
+
+def _key(alias: str) -> str:
+    return "".join(char for char in alias.casefold() if char not in _SEPARATORS)
+
+
+def _trie_pattern(aliases: list[str]) -> str:
+    """
+    Regex matching any alias, factored by common prefixes.
+
+    Separators (space, hyphen, apostrophes) inside an alias are optional, so
+    "Tel Aviv", "Tel-Aviv" and "TelAviv" all match.
+    """
+    trie: dict = {}
+    for alias in aliases:
+        node = trie
+        for char in alias.casefold():
+            if char in _SEPARATORS:
+                char = " "  # One optional-separator atom
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of an alias
+
+    def render(node: dict) -> str:
+        branches = []
+        for char, child in node.items():
+            if char == "":
+                continue
+            atom = f"[{re.escape(_SEPARATORS)}]?" if char == " " else re.escape(char)
+            branches.append(atom + render(child))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A complete alias can stop here or continue into a longer one
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+class GeoMatcher:
+    """Classifies free text as Israeli, foreign or unknown location with one regex."""
+
+    def __init__(
+        self,
+        places: dict[str, list[str]] = ISRAELI_PLACES,
+        country_aliases: list[str] = COUNTRY_ALIASES,
+        foreign: list[str] = FOREIGN_PLACES,
+    ) -> None:
+        self._gazetteer: dict[str, str] = {_key(alias): _FOREIGN for alias in foreign}
+        for alias in country_aliases:
+            self._gazetteer[_key(alias)] = COUNTRY
+        for city, aliases in places.items():
+            for alias in [city, *aliases]:
+                self._gazetteer[_key(alias)] = city
+        aliases = [*foreign, *country_aliases, *(a for names in places.values() for a in names)]
+        aliases += list(places)
+        # Texts are casefolded before matching (cheaper than re.IGNORECASE), and a
+        # lookahead on the possible first letters skips most word starts outright
+        initials = re.escape("".join(sorted({alias.casefold()[0] for alias in aliases})))
+        prefix = rf"(?:[{_HEBREW_PREFIXES}]{{1,2}}(?=[\u0590-\u05ff]))?"
+        self._pattern = re.compile(
+            rf"\b(?=[{initials}{_HEBREW_PREFIXES}]){prefix}({_trie_pattern(aliases)})(?!\w)"
+        )
+
+    def places(self, text: str) -> list[str]:
+        """Canonical names of the places in the text, in order (foreign ones as "")."""
+        found = []
+        for match in self._pattern.finditer(text.casefold()):
+            place = self._gazetteer.get(_key(match.group(1)))
+            if place is not None:
+                found.append(place)
+        return found
+
+    def classify(self, text: str | None) -> GeoMatch:
+        if not text:
+            return GeoMatch(None, True)
+        country = foreign = False
+        for place in self.places(_ITALIAN_LABEL.sub("Italy", text)):
+            if place == _FOREIGN:
+                foreign = True
+            elif place == COUNTRY:
+                country = True
+            else:
+                return GeoMatch(place, True)  # A named Israeli city settles it
+        return GeoMatch(COUNTRY if country else None, country or not foreign)
+
+    def classify_many(self, texts: list[str | None]) -> list[GeoMatch]:
+        """classify() over a batch; repeated texts (reposted snippets) are matched once."""
+        seen: dict[str | None, GeoMatch] = {}
+        results = []
+        for text in texts:
+            match = seen.get(text)
+            if match is None:
+                match = seen[text] = self.classify(text)
+            results.append(match)
+        return results
+
+
+@lru_cache(maxsize=1)
+def default_matcher() -> GeoMatcher:
+    return GeoMatcher()
+
+
+def backfill_locations(db, batch_size: int = settings.UPSERT_BATCH_SIZE) -> int:
+    """Tag stored job posts that have no location yet. Returns the number tagged."""
+    matcher = default_matcher()
+    stmt = select(JobPost.id, JobPost.title, JobPost.snippet).where(JobPost.location.is_(None))
+    updates = []
+    for partition in db.execute(stmt.execution_options(yield_per=batch_size)).partitions():
+        texts = [f"{row.title or ''} {row.snippet or ''}" for row in partition]
+        for row, match in zip(partition, matcher.classify_many(texts)):
+            if match.location:
+                updates.append({"id": row.id, "location": match.location})
+    # Written after the scan: the server-side cursor must not share its transaction
+    for offset in range(0, len(updates), batch_size):
+        db.execute(update(JobPost), updates[offset : offset + batch_size])
+        db.commit()
+    return len(updates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Location tagging of job posts")
+    parser.add_argument("--backfill", action="store_true", help="Tag rows without a location")
+    parser.add_argument("text", nargs="*", help="Classify the given texts instead")
+    args = parser.parse_args()
+    if args.backfill:
+        with session_scope() as db:
+            logger.info(f"📍 Tagged {backfill_locations(db)} job posts with a location")
+        return
+    for text, match in zip(args.text, default_matcher().classify_many(args.text)):
+        print(f"{match.location or '-':<16} {'on' if match.on_target else 'off':<4} {text}")
+
+
+if __name__ == "__main__":
+    main()
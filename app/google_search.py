@@ -1,178 +1,279 @@
-# app/services/google_scraper.py
-###new
-import random
-import time
-from datetime import datetime  # Import datetime for timestamp
-from urllib.parse import quote_plus
-import requests
-
-from app.log_config import logger
-
-
-
-class GoogleSearch:
-    """
-    A class to interact with the Google Custom Search API for job postings.
-    """
-
-    _BASE_URL = "https://www.googleapis.com/customsearch/v1"
-    _DEFAULT_LOCATION = (
-        """"Israel" OR "Tel Aviv" OR "Haifa" OR "Jerusalem" OR "Herzliya" OR "Ramat Gan" """
-    )
-    #     OR "Petah Tikva" OR """
-    #     """"Rehovot" OR "Netanya" OR "Ra'anana" OR "Rishon Lezion" OR "Hod Hasharon" OR "Kfar Saba" OR """
-    #     """"Beer Sheva" OR "Modiin" OR "Holon" OR "Bat Yam" OR "Ashdod" OR "Ashkelon" OR "Eilat" OR """
-    #     """"Nazareth" OR "Tiberias" OR "Safed" OR "Afula" OR "Hadera" OR "Kiryat Gat" OR """
-    #     """"Kiryat Yam" OR "Kiryat Bialik" OR "Kiryat Motzkin" OR "Kiryat Ata" OR "Kiryat Tivon" OR """
-    #     """"Kiryat Malachi" OR "Kiryat Shmona" """
-    # )
-    # _DEFAULT_LOCATION = (
-    #     "Tel Aviv", "Haifa", "Jerusalem", "Herzliya", "Ramat Gan")
-    _DEFAULT_NUM_RESULTS = 20
-    _DATE_RESTRICT = "d2"  # Restrict results to the last week
-    _ALLOWED_JOB_SITES = (
-        "boards.greenhouse.io",
-        "jobs.lever.co",
-        "comeet.com",
-        "workday.com",
-    )
-
-    def __init__(
-        self,
-        api_key: str,
-        search_engine_id: str,
-        client_id: str,
-        keywords: list[str],
-        location: str = _DEFAULT_LOCATION,
-        num_results: int = _DEFAULT_NUM_RESULTS,
-        redis_client=None,  # Optional Redis client for caching
-        db=None,  # Optional database session for storing results
-    ) -> None:
-        """
-        Initialize the GoogleSearch instance with API credentials, keywords, location,
-        and the desired number of results per search.
-
-        Args:
-            api_key (str): Google API key.
-            search_engine_id (str): Google Search Engine ID.
-            client_id (str): Google Client ID.
-            keywords (List[str]): List of job-related keywords.
-            location (str): Job location. Defaults to "ISRAEL".
-            num_results (int): Number of search results to retrieve. Defaults to 20.
-        """
-        if not keywords:
-            raise ValueError("Keywords list cannot be empty.")
-        if not isinstance(keywords, list):
-            raise ValueError("Keywords must be a list of strings.")
-        if not isinstance(location, str):
-            raise ValueError("Location must be a string.")
-        if not isinstance(num_results, int) or num_results <= 0:
-            raise ValueError("Number of results must be a positive integer.")
-
-        self.api_key = api_key
-        self.search_engine_id = search_engine_id
-        self.client_id = client_id
-        self.keywords = keywords
-        if location:
-            self.location = location
-        else:
-            self.location = self._DEFAULT_LOCATION
-        self.num_results = num_results
-        # self.results = []
-        if not all([self.client_id, self.api_key, self.search_engine_id]):
-            raise ValueError("Google API credentials are not set in environment variables.")
-        if not isinstance(location, str):
-            raise ValueError("Location must be a string.")
-        if not isinstance(num_results, int) or num_results <= 0:
-            raise ValueError("Number of results must be a positive integer.")
-        self.results = []
-
-    def build_query(self) -> str:
-        """
-        Construct the search query string.
-
-        Returns:
-            str: The constructed search query.
-        """
-        keywords_clause = " OR ".join([f'"{kw}"' for kw in self.keywords])
-        sites_query = " OR ".join([f"site:{site}" for site in self._ALLOWED_JOB_SITES])
-        return (
-            f"{sites_query} ({keywords_clause}) "  # TODO: what to do with senior? by user?  # noqa: E501
-            f"({self.location})"
-        )
-
-    def is_snippet_valid_for_israel(self, snippet: str) -> bool:
-        """
-        Check if the snippet indicates a job located in Israel.
-
-        Args:
-            snippet (str): The snippet text from the search result.
-
-        Returns:
-            bool: True if the job is located in Israel, False otherwise.
-        """
-        return "Israel, Italy" not in snippet.title()
-
-    def search(self, keywords: list[str] = None) -> list[dict[str, str]]:
-        """
-        Perform the Google Custom Search and retrieve job postings.
-
-        Returns:
-            List[Dict[str, Optional[str]]]: A list of job postings with relevant details.
-        """
-        start_index = 1  # Start from the first result
-        while len(self.results) < self.num_results:
-            params = self.build_params(start_index)
-            response = requests.get(self._BASE_URL, params=params)
-            data = response.json()
-            if "items" not in data:
-                if start_index == 1:
-                    logger.info("No results found for the initial search.")
-                break  # Stop if there are no more results
-            self.results.extend(self.parse_results(data))
-            start_index += 10
-            # Introduce a random delay between requests to avoid hitting the API too quickly
-            time.sleep(random.uniform(1, 3))  # Random delay between 1 and 3 seconds
-        return self.results
-
-    def build_url(self, keywords_clause: str, location_part: str) -> str:
-        query = self.build_query(keywords_clause, location_part)
-        encoded = quote_plus(query)
-        return f"https://www.google.com/search?q={encoded}&tbs=qdr:w2"
-
-    def parse_results(self, data: dict) -> list[dict[str, str]]:
-        results = []
-        for item in data.get("items", []):
-            # Check if the item is from Israel location
-            if not self.is_snippet_valid_for_israel(item.get("snippet", "")):
-                continue
-            results.append(
-                {
-                    "title": item.get("title"),
-                    "link": item.get("link"),
-                    "snippet": item.get("snippet"),
-                    "formattedUrl": item.get("formattedUrl"),
-                    "displayLink": item.get("displayLink"),
-                    "htmlFormattedUrl": item.get("htmlFormattedUrl"),
-                    "htmlSnippet": item.get("htmlSnippet"),
-                    "pagemap": item.get("pagemap"),
-                    "searchInformation": item.get("searchInformation"),
-                    "kind": item.get("kind"),
-                    "cacheId": item.get("cacheId"),
-                    "contextLink": item.get("contextLink"),
-                }
-            )
-        return results
-
-    def build_params(self, start_index: int) -> dict:
-        return {
-            "key": self.api_key,  # attribue and not property
-            "cx": self.search_engine_id,
-            "q": self.build_query(),
-            "num": min(
-                10, self.num_results - len(self.results)
-            ),  # Fetch up to 10 results per request  # noqa: E501
-            "start": start_index,
-            "sort": "date",  # Sort results by recency
-            # "dateRestrict": self._DATE_RESTRICT,      # Only results from the last 1 week
-        }
+# app/services/google_scraper.py
+###new
+import math
+import random
+import time
+from datetime import datetime  # Import datetime for timestamp
+from urllib.parse import quote_plus
+
+from app.config import settings
+from app.geo import default_matcher
+from app.job_validation import SearchHit, parse_items
+from app.log_config import logger
+from app.metrics import SEARCH_API_CALLS, SEARCH_API_ERRORS, SEARCH_PAGE_SECONDS
+from app.resources import get_http_session
+from app.search_guard import SearchAPIError, TransientSearchError, backoff_delay, classify_response
+
+
+
+class GoogleSearch:
+    """
+    A class to interact with the Google Custom Search API for job postings.
+    """
+
+    _BASE_URL = "https://www.googleapis.com/customsearch/v1"
+    _DEFAULT_LOCATION = (
+        """"Israel" OR "Tel Aviv" OR "Haifa" OR "Jerusalem" OR "Herzliya" OR "Ramat Gan" """
+    )
+    # Other cities are not listed in the query: app.geo recognizes them in the results
+    _DEFAULT_NUM_RESULTS = 20
+    _DATE_RESTRICT = "d2"  # Restrict results to the last week
+    _ALLOWED_JOB_SITES = (
+        "boards.greenhouse.io",
+        "jobs.lever.co",
+        "comeet.com",
+        "workday.com",
+    )
+
+    def __init__(
+        self,
+        api_key: str,
+        search_engine_id: str,
+        client_id: str,
+        keywords: list[str],
+        location: str = _DEFAULT_LOCATION,
+        num_results: int = _DEFAULT_NUM_RESULTS,
+        redis_client=None,  # Optional Redis client for caching
+        db=None,  # Optional database session for storing results
+        cache=None,  # Optional SearchCache for parsed result pages
+        known_links=None,  # Optional KnownLinkIndex enabling incremental paging
+        date_restrict: str | None = None,  # Custom Search dateRestrict, e.g. "d3"
+        guard=None,  # Optional SearchGuard: shared daily quota and circuit breaker
+    ) -> None:
+        """
+        Initialize the GoogleSearch instance with API credentials, keywords, location,
+        and the desired number of results per search.
+
+        Args:
+            api_key (str): Google API key.
+            search_engine_id (str): Google Search Engine ID.
+            client_id (str): Google Client ID.
+            keywords (List[str]): List of job-related keywords.
+            location (str): Job location. Defaults to "ISRAEL".
+            num_results (int): Number of search results to retrieve. Defaults to 20.
+            cache (SearchCache, optional): Page cache consulted before calling the API.
+            known_links (KnownLinkIndex, optional): Stop paging once a page holds only
+                links already stored.
+            date_restrict (str, optional): Only fetch results newer than this window.
+            guard (SearchGuard, optional): Checked before every API call, so calls stop
+                for all workers once the quota is spent or the circuit is open.
+        """
+        if not keywords:
+            raise ValueError("Keywords list cannot be empty.")
+        if not isinstance(keywords, list):
+            raise ValueError("Keywords must be a list of strings.")
+        if not isinstance(location, str):
+            raise ValueError("Location must be a string.")
+        if not isinstance(num_results, int) or num_results <= 0:
+            raise ValueError("Number of results must be a positive integer.")
+
+        self.api_key = api_key
+        self.search_engine_id = search_engine_id
+        self.client_id = client_id
+        self.keywords = keywords
+        if location:
+            self.location = location
+        else:
+            self.location = self._DEFAULT_LOCATION
+        self.num_results = num_results
+        # self.results = []
+        if not all([self.client_id, self.api_key, self.search_engine_id]):
+            raise ValueError("Google API credentials are not set in environment variables.")
+        if not isinstance(location, str):
+            raise ValueError("Location must be a string.")
+        if not isinstance(num_results, int) or num_results <= 0:
+            raise ValueError("Number of results must be a positive integer.")
+        self.results = []
+        self.cache = cache
+        self.known_links = known_links
+        self.date_restrict = date_restrict
+        self.pages_fetched = 0
+        self.pages_avoided = 0  # Pages skipped because the tail was already known
+        self.api_calls = 0  # Pages that went to the API (not served from the cache)
+        self.off_target = 0  # Results dropped for naming only foreign locations
+        self.guard = guard
+        self.error: SearchAPIError | None = None  # Set when paging stopped on an API error
+
+    def build_query(self) -> str:
+        """
+        Construct the search query string.
+
+        Returns:
+            str: The constructed search query.
+        """
+        return self.compose_query(self.keywords, self.location)
+
+    @classmethod
+    def compose_query(cls, keywords: list[str], location: str = _DEFAULT_LOCATION) -> str:
+        """
+        Construct the search query string for the given keywords and location.
+
+        Returns:
+            str: The constructed search query.
+        """
+        keywords_clause = " OR ".join([f'"{kw}"' for kw in keywords])
+        sites_query = " OR ".join([f"site:{site}" for site in cls._ALLOWED_JOB_SITES])
+        return (
+            f"{sites_query} ({keywords_clause}) "  # TODO: what to do with senior? by user?  # noqa: E501
+            f"({location})"
+        )
+
+    def is_snippet_valid_for_israel(self, snippet: str) -> bool:
+        """
+        Check if the snippet indicates a job located in Israel.
+
+        Args:
+            snippet (str): The snippet text from the search result.
+
+        Returns:
+            bool: False when the snippet names only foreign places (see app.geo).
+        """
+        return default_matcher().classify(snippet).on_target
+
+    def search(self, keywords: list[str] = None) -> list[SearchHit]:
+        """
+        Perform the Google Custom Search and retrieve job postings.
+
+        Returns:
+            List[SearchHit]: The title, link and snippet of each job posting.
+        """
+        start_index = 1  # Start from the first result
+        while len(self.results) < self.num_results:
+            params = self.build_params(start_index)
+            items = self.cache.get(params) if self.cache else None
+            from_cache = items is not None
+            if not from_cache:
+                try:
+                    items = self.get_page(params)
+                except SearchAPIError as e:
+                    if not self.results:
+                        raise
+                    self.error = e  # Keep the pages already paid for; the caller retries
+                    break
+                if self.cache:
+                    self.cache.set(params, items)
+            self.pages_fetched += 1
+            if not items:
+                if start_index == 1:
+                    logger.info("No results found for the initial search.")
+                break  # Stop if there are no more results
+            page_results = self.parse_results({"items": items})
+            self.results.extend(page_results)
+            start_index += 10
+            if self.page_is_known(page_results):
+                self.pages_avoided = max(0, math.ceil(self.num_results / 10) - self.pages_fetched)
+                break
+            if not from_cache:
+                # Introduce a random delay between requests to avoid hitting the API too quickly
+                time.sleep(random.uniform(1, 3))  # Random delay between 1 and 3 seconds
+        return self.results
+
+    def get_page(self, params: dict) -> list[dict]:
+        """One results page from the API, retrying rate limits and transient errors."""
+        attempt = 0
+        while True:
+            self.before_call()
+            try:
+                with SEARCH_PAGE_SECONDS.time():
+                    response = get_http_session().get(
+                        self._BASE_URL, params=params, timeout=settings.SEARCH_HTTP_TIMEOUT
+                    )
+            except OSError as e:  # requests' exceptions are OSErrors
+                payload, error = {}, TransientSearchError(f"{type(e).__name__}: {e}")
+            else:
+                payload, error = self.read_response(response)
+            self.record(error)
+            if error is None:
+                return payload.get("items", [])
+            time.sleep(self.retry_delay(error, attempt))
+            attempt += 1
+
+    def before_call(self) -> None:
+        """Raises instead of calling when the shared quota is spent or the circuit is open."""
+        if self.guard is not None:
+            self.guard.before_call()
+
+    def read_response(self, response) -> tuple[dict, SearchAPIError | None]:
+        """The response body, and the error it stands for (None for a usable page)."""
+        SEARCH_API_CALLS.inc()
+        self.api_calls += 1
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        return payload, classify_response(response.status_code, payload, response.headers)
+
+    def record(self, error: SearchAPIError | None) -> None:
+        if error is not None:
+            SEARCH_API_ERRORS.labels(kind=type(error).__name__).inc()
+        if self.guard is not None:
+            self.guard.record(error)
+
+    def retry_delay(self, error: SearchAPIError, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a failed call; raises the error instead when
+        it is not retryable, retries are used up or the server asks for a long wait
+        (the keywords are re-queued then, rather than holding a worker).
+        """
+        if (
+            not error.retryable
+            or attempt >= settings.SEARCH_MAX_RETRIES
+            or (error.retry_after or 0) > settings.SEARCH_BACKOFF_MAX
+        ):
+            raise error
+        delay = backoff_delay(attempt, error.retry_after)
+        logger.warning(
+            f"🔁 Custom Search call for {self.keywords} failed ({error}); "
+            f"retry {attempt + 1}/{settings.SEARCH_MAX_RETRIES} in {delay:.1f}s"
+        )
+        return delay
+
+    def page_is_known(self, page_results: list[SearchHit]) -> bool:
+        """
+        True when incremental paging is on and every kept link on the page is already stored.
+
+        Results are sorted by date, so the pages after such a page are older still.
+        """
+        if self.known_links is None:
+            return False
+        links = [hit.link for hit in page_results if hit.link]
+        if not links:
+            return False
+        return len(self.known_links.contains_many(links)) == len(links)
+
+    def build_url(self, keywords_clause: str, location_part: str) -> str:
+        query = self.build_query(keywords_clause, location_part)
+        encoded = quote_plus(query)
+        return f"https://www.google.com/search?q={encoded}&tbs=qdr:w2"
+
+    def parse_results(self, data: dict) -> list[SearchHit]:
+        items = data.get("items", [])
+        hits = parse_items(items)
+        self.off_target += len(items) - len(hits)
+        return hits
+
+    def build_params(self, start_index: int, num: int | None = None) -> dict:
+        if num is None:
+            num = min(10, self.num_results - len(self.results))
+        params = {
+            "key": self.api_key,  # attribue and not property
+            "cx": self.search_engine_id,
+            "q": self.build_query(),
+            "num": num,  # Fetch up to 10 results per request
+            "start": start_index,
+            "sort": "date",  # Sort results by recency
+            # "dateRestrict": self._DATE_RESTRICT,      # Only results from the last 1 week
+        }
+        if self.date_restrict:
+            params["dateRestrict"] = self.date_restrict  # Only what is new since the last run
+        return params
@@ -1,9 +1,19 @@
-from app.database import Base, engine
-from app.models.JobPost import JobPost  # 👈 ensure the model is imported
-from app.log_config import logger
-
-
-def init_db():
-    logger.info("Creating tables if they do not exist...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database initialized!")
+from app.database import Base, get_engine
+from app.models.JobPost import JobPost  # 👈 ensure the model is imported
+from app.log_config import logger
+from app.migrations import run_migrations
+
+
+def init_db():
+    """Create missing tables and apply pending migrations (`python -m app.init_db`)."""
+    logger.info("Creating tables if they do not exist...")
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    if applied:
+        logger.info(f"Applied migrations: {applied}")
+    logger.info("Database initialized!")
+
+
+if __name__ == "__main__":
+    init_db()
@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.models.JobPost import JobPost
+from app.schemas.job_post_schema import JobPostOut
+
+EXPORT_FORMATS = ("ndjson", "csv")
+_COLUMNS = [getattr(JobPost, name) for name in JobPostOut.model_fields]
+
+
+def export_high_water(db, since: int = 0) -> int:
+    """
+    Export cursor bound: the oldest transaction id still running.
+
+    Exports are cut on `insert_xid` rather than on id. Ids are taken at INSERT
+    time, so with several workers upserting a row with a lower id than the last
+    one exported could still commit later and be skipped for good. Every
+    transaction below the snapshot's xmin has finished, so the rows it inserted
+    are all visible now and nothing can be added below the bound afterwards.
+    """
+    xmin = db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+    return max(since, xmin.scalar())
+
+
+def iter_job_posts(
+    db, since: int = 0, upto: int | None = None, batch_size: int = settings.EXPORT_BATCH_SIZE
+) -> Iterator[list[JobPostOut]]:
+    """
+    Stream job posts inserted by transactions `since <= insert_xid < upto`, one
+    batch at a time, in (insert_xid, id) order.
+
+    Uses a server-side cursor (`yield_per`), so only one batch of rows is ever in
+    memory whatever the size of the table.
+    """
+    stmt = (
+        select(*_COLUMNS)
+        .where(JobPost.insert_xid >= since)
+        .order_by(JobPost.insert_xid, JobPost.id)
+    )
+    if upto is not None:
+        stmt = stmt.where(JobPost.insert_xid < upto)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [JobPostOut.model_validate(row._mapping) for row in partition]
+
+
+def ndjson_chunks(batches: Iterable[list[JobPostOut]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(post.model_dump_json().encode() + b"\n" for post in batch)
+
+
+def csv_chunks(batches: Iterable[list[JobPostOut]]) -> Iterator[bytes]:
+    fields = list(JobPostOut.model_fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for batch in batches:
+        for post in batch:
+            row = post.model_dump(mode="json")
+            row["keywords"] = json.dumps(row["keywords"], ensure_ascii=False)
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,192 @@
+import json
+import time
+import uuid
+
+from app.config import settings
+from app.log_config import logger
+
+_QUEUE_KEY = "scrape:queue"
+_DELAYED_KEY = "scrape:delayed"  # Sorted set of job ids by the time they become due
+_JOB_KEY = "scrape:job:{}"
+_INFLIGHT_KEY = "scrape:inflight:{}"
+
+# Release an in-flight keyword only if it still points at the finishing job
+_RELEASE_INFLIGHT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Move jobs whose delay is over onto the queue
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, job_id in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job_id)
+    redis.call('RPUSH', KEYS[2], job_id)
+end
+return #due
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+
+class ScrapeJobQueue:
+    """
+    Redis-backed queue of scrape jobs.
+
+    Jobs are hashes under `scrape:job:{id}` holding the status, keywords and
+    progress counters; ids are pushed onto the `scrape:queue` list for the
+    workers. Each keyword is claimed in `scrape:inflight:{keyword}` while its
+    job is pending, so a second submission for it joins the running job.
+    Delayed jobs (re-queued retries) wait in `scrape:delayed` until they are due.
+    """
+
+    def __init__(self, redis_service):
+        self.redis = redis_service
+        self.client = redis_service.get_client()
+        self._release_inflight = self.client.register_script(_RELEASE_INFLIGHT)
+        self._promote_due = self.client.register_script(_PROMOTE_DUE)
+
+    def _claim(self, inflight_key: str, job_id: str, ttl: int) -> bool:
+        return bool(self.client.set(inflight_key, job_id, nx=True, ex=ttl))
+
+    def submit(self, keywords: list[str], delay: float = 0, attempt: int = 0) -> dict:
+        """
+        Enqueue a scrape for the keywords not already in flight.
+
+        Args:
+            keywords (List[str]): Keywords to scrape.
+            delay (float): Seconds before a worker may pick the job up (for retries).
+            attempt (int): How many times these keywords were re-queued already.
+
+        Returns:
+            dict: `job_id` of the new job (None when every keyword was coalesced)
+            and `coalesced`, mapping keywords to the in-flight job running them.
+        """
+        job_id = uuid.uuid4().hex
+        claimed, coalesced = [], {}
+        ttl = settings.SCRAPE_INFLIGHT_TTL + int(delay)  # Held while the job waits, too
+        for keyword in dict.fromkeys(keywords):
+            inflight_key = _INFLIGHT_KEY.format(keyword)
+            if self._claim(inflight_key, job_id, ttl):
+                claimed.append(keyword)
+                continue
+            running_job = self.client.get(inflight_key)
+            if running_job is None:
+                # The other job finished between SET and GET; retry the claim once
+                if self._claim(inflight_key, job_id, ttl):
+                    claimed.append(keyword)
+                    continue
+                running_job = self.client.get(inflight_key)
+            coalesced[keyword] = running_job
+
+        if not claimed:
+            logger.info(f"All keywords already in flight: {coalesced}")
+            return {"job_id": None, "coalesced": coalesced}
+
+        job_key = _JOB_KEY.format(job_id)
+        now = time.time()
+        job = {
+            "status": QUEUED,
+            "keywords": json.dumps(claimed),
+            "created_at": now,
+            "version": 0,
+            "attempt": attempt,
+        }
+        pipe = self.client.pipeline()
+        if delay > 0:
+            job["not_before"] = now + delay
+            pipe.zadd(_DELAYED_KEY, {job_id: now + delay})
+        else:
+            pipe.rpush(_QUEUE_KEY, job_id)
+        pipe.hset(job_key, mapping=job)
+        pipe.expire(job_key, settings.SCRAPE_JOB_TTL + int(delay))
+        pipe.execute()
+        if delay > 0:
+            logger.info(f"Queued scrape job {job_id} for keywords {claimed} in {delay:.0f}s")
+        else:
+            logger.info(f"Queued scrape job {job_id} for keywords {claimed}")
+        return {"job_id": job_id, "coalesced": coalesced}
+
+    def dequeue(self, timeout: int = 5) -> tuple[str, list[str]] | None:
+        """Block until a job is available; returns its id and keywords."""
+        self._promote_due(keys=[_DELAYED_KEY, _QUEUE_KEY], args=[time.time()])
+        popped = self.client.blpop([_QUEUE_KEY], timeout=timeout)
+        if popped is None:
+            return None
+        job_id = popped[1]
+        keywords = self.client.hget(_JOB_KEY.format(job_id), "keywords")
+        if keywords is None:
+            logger.warning(f"Dropping expired scrape job {job_id}")
+            return None
+        self.update(job_id, status=RUNNING, started_at=time.time())
+        return job_id, json.loads(keywords)
+
+    def update(self, job_id: str, **fields) -> None:
+        """Set job fields and bump its version so event streams notice the change."""
+        job_key = _JOB_KEY.format(job_id)
+        pipe = self.client.pipeline()
+        pipe.hset(job_key, mapping=fields)
+        pipe.hincrby(job_key, "version", 1)
+        pipe.execute()
+
+    def report_progress(self, job_id: str, counters: dict) -> None:
+        self.update(job_id, progress=json.dumps(counters))
+
+    def finish(
+        self, job_id: str, keywords: list[str], result: dict | None, error: str | None = None
+    ) -> None:
+        if error is None:
+            self.update(
+                job_id, status=COMPLETED, result=json.dumps(result), finished_at=time.time()
+            )
+        else:
+            self.update(job_id, status=FAILED, error=error, finished_at=time.time())
+        for keyword in keywords:
+            self._release_inflight(keys=[_INFLIGHT_KEY.format(keyword)], args=[job_id])
+
+    def requeue(self, job_id: str, keywords: list[str], min_delay: float = 0) -> dict | None:
+        """
+        Submit a finished job's failed keywords again, SCRAPE_REQUEUE_DELAY later
+        (doubling per attempt) and no sooner than `min_delay`.
+
+        Returns:
+            dict: The new submission (also recorded on the old job as `requeued`),
+            or None once the keywords were re-queued SCRAPE_MAX_REQUEUES times.
+        """
+        attempt = int(self.client.hget(_JOB_KEY.format(job_id), "attempt") or 0) + 1
+        if attempt > settings.SCRAPE_MAX_REQUEUES:
+            logger.warning(f"Giving up on {keywords} after {attempt - 1} re-queued attempts")
+            return None
+        delay = max(min_delay, settings.SCRAPE_REQUEUE_DELAY * 2 ** (attempt - 1))
+        submission = self.submit(keywords, delay=delay, attempt=attempt)
+        self.update(job_id, requeued=json.dumps({**submission, "delay": round(delay, 1)}))
+        return submission
+
+    def get(self, job_id: str) -> dict | None:
+        raw = self.client.hgetall(_JOB_KEY.format(job_id))
+        if not raw:
+            return None
+        job = {
+            "job_id": job_id,
+            "status": raw["status"],
+            "keywords": json.loads(raw["keywords"]),
+            "version": int(raw["version"]),
+            "progress": json.loads(raw.get("progress", "{}")),
+            "attempt": int(raw.get("attempt", 0)),
+        }
+        for field in ("created_at", "not_before", "started_at", "finished_at"):
+            if field in raw:
+                job[field] = float(raw[field])
+        if "result" in raw:
+            job["result"] = json.loads(raw["result"])
+        if "error" in raw:
+            job["error"] = raw["error"]
+        if "requeued" in raw:
+            job["requeued"] = json.loads(raw["requeued"])
+        return job
@@ -0,0 +1,178 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import cast, func, literal_column, select, text, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+
+from app.config import settings
+from app.log_config import logger
+from app.models.JobPost import TEXT_SEARCH_CONFIG, JobPost
+
+# Append only the keywords the stored row does not have yet, keeping the existing order
+_MERGED_KEYWORDS = literal_column(
+    "array_cat(coalesce(job_posts.keywords, '{}'), "
+    "ARRAY(SELECT kw FROM unnest(excluded.keywords) AS kw "
+    "WHERE kw <> ALL(coalesce(job_posts.keywords, '{}'))))"
+)
+# Skip the UPDATE (and the dead tuple it leaves) when nothing new would be merged and
+# last_seen_at was refreshed within LAST_SEEN_REFRESH seconds
+_NEEDS_UPDATE = text(
+    "NOT (excluded.keywords <@ coalesce(job_posts.keywords, '{}')) "
+    "OR job_posts.last_seen_at IS NULL "
+    "OR job_posts.last_seen_at < excluded.last_seen_at - make_interval(secs => :refresh)"
+)
+
+
+def encode_cursor(scraped_at: datetime, job_id: int) -> str:
+    """Opaque keyset cursor pointing just after the given row."""
+    raw = json.dumps([scraped_at.isoformat(), job_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        scraped_at, job_id = json.loads(raw)
+        return datetime.fromisoformat(scraped_at), int(job_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class JobPostRepository:
+    """
+    Batched persistence for job posts.
+
+    Writes a whole batch with one `INSERT ... ON CONFLICT (link) DO UPDATE` per
+    chunk instead of an existence check and a commit per row.
+    """
+
+    def __init__(self, db, batch_size: int = settings.UPSERT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+
+    @staticmethod
+    def merge_rows(rows: list[dict]) -> list[dict]:
+        """
+        Collapse rows sharing a link into one row with the union of their keywords.
+
+        Postgres refuses to touch the same row twice in one ON CONFLICT statement,
+        so a link must appear at most once per batch.
+        """
+        merged: dict[str, dict] = {}
+        for row in rows:
+            existing = merged.get(row["link"])
+            if existing is None:
+                merged[row["link"]] = {**row, "keywords": list(row["keywords"])}
+                continue
+            for keyword in row["keywords"]:
+                if keyword not in existing["keywords"]:
+                    existing["keywords"].append(keyword)
+        return list(merged.values())
+
+    def upsert_many(self, rows: list[dict]) -> dict[str, int]:
+        """
+        Insert new job posts and merge keywords into the ones already stored.
+
+        Args:
+            rows (List[dict]): Validated JobPost column values, each with a `link`.
+
+        Returns:
+            Dict[str, int]: `added`, `skipped` (already stored) and `failed` row counts.
+        """
+        return self.upsert_many_tracked(rows)[0]
+
+    def upsert_many_tracked(self, rows: list[dict]) -> tuple[dict[str, int], set[str]]:
+        """Like upsert_many, but also returns the set of links that were newly inserted."""
+        counts = {"added": 0, "skipped": 0, "failed": 0}
+        inserted_links: set[str] = set()
+        occurrences: dict[str, int] = {}
+        for row in rows:
+            occurrences[row["link"]] = occurrences.get(row["link"], 0) + 1
+        merged = self.merge_rows(rows)
+        for offset in range(0, len(merged), self.batch_size):
+            chunk = merged[offset : offset + self.batch_size]
+            # Repeats of a link inside the batch count like the per-row path did:
+            # the first occurrence is added, the rest are skipped as existing
+            repeats = sum(occurrences[row["link"]] - 1 for row in chunk)
+            stmt = insert(JobPost).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[JobPost.link],
+                set_={"keywords": _MERGED_KEYWORDS, "last_seen_at": stmt.excluded.last_seen_at},
+                where=_NEEDS_UPDATE.bindparams(refresh=settings.LAST_SEEN_REFRESH),
+            ).returning(JobPost.link, literal_column("(xmax = 0)").label("inserted"))
+            try:
+                links = [row.link for row in self.db.execute(stmt) if row.inserted]
+                self.db.commit()
+            except Exception as e:
+                logger.error(f"Failed to upsert {len(chunk)} job posts: {e}")
+                self.db.rollback()
+                counts["failed"] += len(chunk) + repeats
+                continue
+            inserted_links.update(links)
+            counts["added"] += len(links)
+            counts["skipped"] += len(chunk) - len(links) + repeats
+        return counts, inserted_links
+
+    def page(
+        self,
+        cursor: str | None = None,
+        limit: int = 50,
+        keywords: list[str] | None = None,
+        company: str | None = None,
+        location: str | None = None,
+        validated: bool | None = None,
+        scraped_from: datetime | None = None,
+        scraped_to: datetime | None = None,
+        query: str | None = None,
+    ) -> tuple[list[JobPost], str | None]:
+        """
+        One page of stored job posts, newest first, using keyset pagination.
+
+        Pages are ordered by (scraped_at, id) and continue strictly after the
+        cursor, so deep pages cost the same as the first one (no OFFSET scan).
+        Rows without scraped_at are never listed.
+
+        Args:
+            cursor (str, optional): `next_cursor` of the previous page.
+            limit (int): Page size.
+            keywords (List[str], optional): Posts must carry all of these keywords.
+            company (str, optional): Case-insensitive exact company match.
+            location (str, optional): Case-insensitive exact location match.
+            validated (bool, optional): Filter on the validated flag.
+            scraped_from (datetime, optional): Inclusive lower bound on scraped_at.
+            scraped_to (datetime, optional): Exclusive upper bound on scraped_at.
+            query (str, optional): Full-text search (web search syntax) over title,
+                snippet and description.
+
+        Returns:
+            Tuple[List[JobPost], Optional[str]]: The posts and the cursor of the next
+            page, or None on the last page.
+        """
+        stmt = select(JobPost).where(JobPost.scraped_at.isnot(None))
+        if cursor:
+            scraped_at, job_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(JobPost.scraped_at, JobPost.id) < (scraped_at, job_id))
+        if keywords:
+            stmt = stmt.where(JobPost.keywords.contains(keywords))  # GIN-indexed @>
+        if company:
+            stmt = stmt.where(func.lower(JobPost.company) == company.lower())
+        if location:
+            stmt = stmt.where(func.lower(JobPost.location) == location.lower())
+        if validated is not None:
+            stmt = stmt.where(JobPost.validated.is_(validated))
+        if scraped_from:
+            stmt = stmt.where(JobPost.scraped_at >= scraped_from)
+        if scraped_to:
+            stmt = stmt.where(JobPost.scraped_at < scraped_to)
+        if query:
+            tsquery = func.websearch_to_tsquery(cast(TEXT_SEARCH_CONFIG, REGCONFIG), query)
+            stmt = stmt.where(JobPost.search_vector.op("@@")(tsquery))
+        stmt = stmt.order_by(JobPost.scraped_at.desc(), JobPost.id.desc()).limit(limit + 1)
+
+        posts = list(self.db.execute(stmt).scalars())
+        if len(posts) <= limit:
+            return posts, None
+        posts = posts[:limit]
+        return posts, encode_cursor(posts[-1].scraped_at, posts[-1].id)
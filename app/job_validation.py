@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+from typing_extensions import TypedDict  # Pydantic needs it on Python < 3.12
+
+from app.canonicalize import canonicalize_link
+from app.geo import default_matcher
+from app.log_config import log_sampled, logger
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """The part of a search result that is persisted; the rest is dropped on parse."""
+
+    title: str | None
+    link: str | None
+    snippet: str | None
+    location: str | None = None  # Tagged by app.geo from the title and snippet
+    keywords: list[str] = field(default_factory=list)  # Set by the source that found it
+
+
+class _JobPostFields(TypedDict):
+    title: str
+    link: HttpUrl
+    snippet: Optional[str]
+
+
+_BATCH_ADAPTER = TypeAdapter(list[_JobPostFields])
+
+
+def parse_items(items: list[dict]) -> list[SearchHit]:
+    """Slim raw Custom Search items down to SearchHits, dropping off-target locations."""
+    texts = [f"{item.get('title') or ''} {item.get('snippet') or ''}" for item in items]
+    hits = []
+    for item, geo in zip(items, default_matcher().classify_many(texts)):
+        if geo.on_target:
+            hit = SearchHit(item.get("title"), item.get("link"), item.get("snippet"), geo.location)
+            hits.append(hit)
+    return hits
+
+
+def validate_batch(
+    hits: list[SearchHit], keywords: list[list[str]], **columns
+) -> tuple[list[dict], list[int]]:
+    """
+    Validate and normalize a batch of hits into job_posts rows in one pass.
+
+    One TypeAdapter call checks the whole batch; when some items fail, they are
+    logged and dropped, and the rest are validated again.
+
+    Args:
+        hits (List[SearchHit]): Hits carrying a title and a link.
+        keywords (List[List[str]]): Keywords each hit was attributed to.
+        **columns: Values shared by every row (e.g. `source`, `scraped_at`).
+
+    Returns:
+        The rows (links canonicalized) and, for each row, the index of its hit.
+    """
+    raw = [{"title": hit.title, "link": hit.link, "snippet": hit.snippet} for hit in hits]
+    kept = list(range(len(hits)))
+    try:
+        validated = _BATCH_ADAPTER.validate_python(raw)
+    except ValidationError as e:
+        bad = {error["loc"][0] for error in e.errors()}
+        for index in sorted(bad):
+            if log_sampled("invalid_job"):
+                logger.error(f"Skipping invalid job: {hits[index]}")
+        kept = [index for index in kept if index not in bad]
+        validated = _BATCH_ADAPTER.validate_python([raw[index] for index in kept])
+    rows = [
+        {
+            "title": fields["title"],
+            # The canonical link form is the dedup key
+            "link": canonicalize_link(str(fields["link"])),
+            "snippet": fields["snippet"],
+            "location": hits[index].location,
+            "keywords": keywords[index],
+            "validated": False,
+            **columns,
+        }
+        for fields, index in zip(validated, kept)
+    ]
+    return rows, kept
@@ -0,0 +1,207 @@
+import hashlib
+import math
+
+from sqlalchemy import select, text
+
+from app.canonicalize import canonicalize_link
+from app.config import settings
+from app.log_config import logger
+from app.models.JobPost import JobPost
+
+_BLOOM_KEY = "job_links:bloom"
+_META_KEY = "job_links:bloom:meta"
+_BUILD_KEY = "job_links:bloom:building"  # Filled by a warm load, then renamed over _BLOOM_KEY
+_BUILD_META_KEY = "job_links:bloom:building:meta"
+_LOAD_LOCK_KEY = "job_links:bloom:loading"
+_WARM_LOAD_BATCH = 10000
+
+
+class LinkBloomFilter:
+    """
+    Bloom filter over job links kept in a Redis bitmap, shared by every worker.
+
+    Sized from the expected number of links and the target false-positive rate;
+    positions come from double hashing one 128-bit BLAKE2b digest per link.
+    """
+
+    def __init__(
+        self,
+        client,
+        capacity: int = settings.DEDUP_EXPECTED_LINKS,
+        error_rate: float = settings.DEDUP_FALSE_POSITIVE_RATE,
+        key: str = _BLOOM_KEY,
+        meta_key: str = _META_KEY,
+    ):
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive integer.")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1.")
+        self.client = client
+        self.key = key
+        self.meta_key = meta_key
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+
+    def _positions(self, link: str) -> list[int]:
+        digest = hashlib.blake2b(link.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add_many(self, links: list[str]) -> int:
+        """Add links; returns how many were new (had at least one bit still unset)."""
+        if not links:
+            return 0
+        pipe = self.client.pipeline(transaction=False)
+        for link in links:
+            for position in self._positions(link):
+                pipe.setbit(self.key, position, 1)
+        old_bits = pipe.execute()
+        # Links already in the filter (re-added on every scrape) do not count again
+        k = self.num_hashes
+        added = sum(not all(old_bits[i * k : (i + 1) * k]) for i in range(len(links)))
+        if added:
+            self.client.hincrby(self.meta_key, "items", added)
+        return added
+
+    def might_contain_many(self, links: list[str]) -> list[bool]:
+        if not links:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for link in links:
+            for position in self._positions(link):
+                pipe.getbit(self.key, position)
+        bits = pipe.execute()
+        k = self.num_hashes
+        return [all(bits[i * k : (i + 1) * k]) for i in range(len(links))]
+
+    def is_loaded(self) -> bool:
+        """True when a fully loaded filter with this layout is already in Redis."""
+        meta = self.client.hgetall(self.meta_key)
+        return (
+            meta.get("bits") == str(self.num_bits)
+            and meta.get("hashes") == str(self.num_hashes)
+            and meta.get("loaded") == "1"
+        )
+
+    def reset(self) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self.key, self.meta_key)
+        pipe.setbit(self.key, self.num_bits - 1, 0)  # Allocate the whole bitmap up front
+        pipe.hset(
+            self.meta_key,
+            mapping={"bits": self.num_bits, "hashes": self.num_hashes, "items": 0, "loaded": 0},
+        )
+        pipe.execute()
+
+    def mark_loaded(self) -> None:
+        self.client.hset(self.meta_key, "loaded", 1)
+
+    def replace(self, other: "LinkBloomFilter") -> None:
+        """Atomically move this filter's bitmap and metadata over `other`'s keys."""
+        pipe = self.client.pipeline()
+        pipe.rename(self.key, other.key)
+        pipe.rename(self.meta_key, other.meta_key)
+        pipe.execute()
+
+    def stats(self) -> dict:
+        items = int(self.client.hget(self.meta_key, "items") or 0)
+        # Expected false-positive rate at the current fill level
+        current_rate = (1 - math.exp(-self.num_hashes * items / self.num_bits)) ** self.num_hashes
+        return {
+            "capacity": self.capacity,
+            "items": items,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "memory_bytes": math.ceil(self.num_bits / 8),
+            "target_false_positive_rate": self.error_rate,
+            "estimated_false_positive_rate": current_rate,
+        }
+
+
+class KnownLinkIndex:
+    """
+    Dedup index answering "is this job link already stored?" for a batch of links.
+
+    The Bloom filter answers most lookups from Redis; only its possible hits go
+    to the database, in one batched query, to rule out false positives.
+    """
+
+    def __init__(self, client, db=None, bloom: LinkBloomFilter | None = None):
+        self.bloom = bloom or LinkBloomFilter(client)
+        self.client = client
+        self.db = db  # Without a session, Bloom hits are trusted as-is
+
+    def contains_many(self, links: list[str]) -> set[str]:
+        """Return the subset of `links` already stored."""
+        if not links:
+            return set()
+        canonical = {link: canonicalize_link(link) for link in links}
+        candidates = [
+            link
+            for link, maybe in zip(links, self.bloom.might_contain_many(list(canonical.values())))
+            if maybe
+        ]
+        if not candidates or self.db is None:
+            return set(candidates)
+        stored = set(
+            self.db.execute(
+                text("SELECT link FROM job_posts WHERE link = ANY(:links)"),
+                {"links": list({canonical[link] for link in candidates})},
+            ).scalars()
+        )
+        return {link for link in candidates if canonical[link] in stored}
+
+    def _building(self) -> LinkBloomFilter:
+        """The filter a warm load fills before it replaces the live one."""
+        return LinkBloomFilter(
+            self.client,
+            self.bloom.capacity,
+            self.bloom.error_rate,
+            key=_BUILD_KEY,
+            meta_key=_BUILD_META_KEY,
+        )
+
+    def add_many(self, links: list[str]) -> None:
+        canonical = [canonicalize_link(link) for link in links]
+        self.bloom.add_many(canonical)
+        if self.client.exists(_LOAD_LOCK_KEY):
+            # A warm load is running: its filter must not miss links stored meanwhile
+            self._building().add_many(canonical)
+
+    def warm_load(self, db, force: bool = False) -> int:
+        """
+        Build the filter from job_posts.link, streaming the column in batches.
+
+        Skipped when a filter with the same layout already exists, so restarts and
+        additional workers reuse it. The new filter is built under a separate key
+        and renamed over the live one when complete, so lookups keep using the old
+        filter meanwhile. Returns the number of links loaded.
+        """
+        if not force and self.bloom.is_loaded():
+            logger.info("Dedup index already loaded; skipping warm load")
+            return 0
+        # Only one process rebuilds at a time
+        if not self.client.set(_LOAD_LOCK_KEY, "1", nx=True, ex=600):
+            logger.info("Dedup index warm load already running elsewhere")
+            return 0
+        building = self._building()
+        try:
+            building.reset()
+            loaded = 0
+            stmt = select(JobPost.link).where(JobPost.link.isnot(None))
+            result = db.execute(stmt.execution_options(yield_per=_WARM_LOAD_BATCH))
+            for partition in result.scalars().partitions():
+                building.add_many([canonicalize_link(link) for link in partition])
+                loaded += len(partition)
+            building.mark_loaded()
+            building.replace(self.bloom)
+            logger.info(f"Dedup index warm-loaded with {loaded} links: {self.bloom.stats()}")
+            return loaded
+        finally:
+            self.client.delete(_BUILD_KEY, _BUILD_META_KEY, _LOAD_LOCK_KEY)
+
+    def stats(self) -> dict:
+        return self.bloom.stats()
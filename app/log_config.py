@@ -1,35 +1,183 @@
-import os
-import sys
-
-from loguru import logger 
-
-
-# Remove default handler
-logger.remove()
-
-
-log_dir = os.path.join(os.path.dirname(__file__), "logs")
-logger.info("📁 Log directory:", log_dir)
-os.makedirs(log_dir, exist_ok=True) 
-# Console output
-logger.add(
-    sys.stdout,
-    level="DEBUG",
-    colorize=True,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-)
-
-# File output (rotates at 10 MB, retains 7 days, compressed)
-log_file_path = os.path.join(log_dir, "job_scraper.log")
-
-logger.add(
-    "logs/job_scraper.log",
-    rotation="10 MB",
-    retention="7 days",
-    compression="zip",
-    level="DEBUG",
-    enqueue=True,
-)
-
-# Test log
-logger.debug("Logger successfully configured.")
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+
+from loguru import logger
+
+from app.config import settings
+
+_TEXT_FORMAT = "{time} | {level: <8} | {name}:{function}:{line} - {message}"
+_COLORS = {
+    "TRACE": "\x1b[36m", "DEBUG": "\x1b[34m", "INFO": "\x1b[1m", "SUCCESS": "\x1b[32m",
+    "WARNING": "\x1b[33m", "ERROR": "\x1b[31m", "CRITICAL": "\x1b[41m",
+}  # fmt: skip
+_RESET = "\x1b[0m"
+
+
+class QueueSink:
+    """
+    Loguru sink that hands records to a writer thread through a bounded queue.
+
+    The logging call only enqueues the record; formatting (text or JSON) and the
+    write happen on the writer thread. When the queue is full the record is
+    dropped instead of blocking the caller, and the writer reports how many were
+    dropped.
+    """
+
+    def __init__(self, stream, maxsize: int, json_lines: bool = False, colorize: bool = False):
+        self.stream = stream
+        self.maxsize = maxsize
+        self.json_lines = json_lines
+        self.colorize = colorize
+        self.dropped = 0
+        self._start()
+        # Threads do not survive fork: worker processes get a writer of their own
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self) -> None:
+        self._queue: queue.Queue = queue.Queue(self.maxsize)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        try:
+            self._queue.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def render(self, record: dict) -> str:
+        if self.json_lines:
+            entry = {
+                "time": record["time"].isoformat(),
+                "level": record["level"].name,
+                "logger": record["name"],
+                "function": record["function"],
+                "line": record["line"],
+                "message": record["message"],
+                **record["extra"],
+            }
+            if record["exception"] is not None:
+                entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+            return json.dumps(entry, default=str) + "\n"
+        level = record["level"].name
+        line = _TEXT_FORMAT.format(
+            time=record["time"].strftime("%Y-%m-%d %H:%M:%S"),
+            level=level,
+            name=record["name"],
+            function=record["function"],
+            line=record["line"],
+            message=record["message"],
+        )
+        if self.colorize:
+            line = f"{_COLORS.get(level, '')}{line}{_RESET}"
+        if record["exception"] is not None:
+            line += "\n" + "".join(traceback.format_exception(*record["exception"])).rstrip()
+        return line + "\n"
+
+    def _drain(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            # Write whatever piled up in one go, one flush per batch
+            while len(records) < 1000:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            chunk = "".join(self.render(record) for record in records)
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                chunk += f"{dropped} log messages dropped: the log queue was full\n"
+            try:
+                self.stream.write(chunk)
+                self.stream.flush()
+            except Exception:
+                pass  # Nowhere left to report it
+            for _ in records:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait (bounded) until queued records are written, e.g. before exit."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class EventSampler:
+    """
+    Decides whether a per-item message is logged: one in `every` occurrences of
+    an event, and at most `max_per_second` of them per second.
+
+    Checked before the message is built, so skipped messages cost a counter bump:
+
+        if log_sampled("scraped_job"):
+            logger.info(f"Scraped job: {hit.title} - {hit.link}")
+    """
+
+    def __init__(self, every: int, max_per_second: float) -> None:
+        self.every = every
+        self.max_per_second = max_per_second
+        self._seen: dict[str, int] = {}
+        self._window: dict[str, tuple[int, int]] = {}  # event -> (second, messages logged)
+
+    def __call__(self, event: str) -> bool:
+        if self.every <= 0:
+            return False
+        seen = self._seen[event] = self._seen.get(event, 0) + 1
+        if (seen - 1) % self.every:
+            return False
+        if self.max_per_second <= 0:
+            return True
+        second = int(time.monotonic())
+        window_second, logged = self._window.get(event, (second, 0))
+        if window_second != second:
+            logged = 0
+        if logged >= self.max_per_second:
+            return False
+        self._window[event] = (second, logged + 1)
+        return True
+
+
+# Remove default handler
+logger.remove()
+
+# Console output, written by a background thread unless LOG_QUEUE_SIZE is 0
+if settings.LOG_QUEUE_SIZE:
+    console_sink = QueueSink(
+        sys.stdout,
+        settings.LOG_QUEUE_SIZE,
+        json_lines=settings.LOG_JSON,
+        colorize=not settings.LOG_JSON and sys.stdout.isatty(),
+    )
+    logger.add(console_sink, level=settings.LOG_LEVEL, format="{message}")
+    atexit.register(console_sink.flush)
+else:
+    logger.add(
+        sys.stdout,
+        level=settings.LOG_LEVEL,
+        colorize=not settings.LOG_JSON,
+        serialize=settings.LOG_JSON,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+    )
+
+# File output (rotates at 10 MB, retains 7 days, compressed); LOG_FILE="" turns it off
+if settings.LOG_FILE:
+    logger.add(
+        settings.LOG_FILE,
+        rotation="10 MB",
+        retention="7 days",
+        compression="zip",
+        level=settings.LOG_FILE_LEVEL,
+        serialize=settings.LOG_JSON,
+        enqueue=True,
+    )
+
+# Per-item messages (one per scraped result) go through this first
+log_sampled = EventSampler(settings.LOG_SAMPLE_EVERY, settings.LOG_SAMPLE_MAX_PER_SECOND)
+
+# Test log
+logger.debug("Logger successfully configured.")
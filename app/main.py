@@ -1,97 +1,281 @@
-from fastapi import FastAPI, Request,Header, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from fastapi import Depends
-from sqlalchemy import text
-from app.database import get_db
-from app.google_search import GoogleSearch
-from app.redis_service import RedisService
-from app.scraper_service import JobScraperService
-from app.config import settings
-from app.log_config import logger
-from app.init_db import init_db
-from typing import Optional
-
-if settings.DEBUG:
-    import debugpy
-    debugpy.listen(("0.0.0.0", 5678))
-    print("🪲 Waiting for debugger to attach...")
-    debugpy.wait_for_client()
-
-logger.info("Starting FastAPI app...")
-logger.info("Starting FastAPI app...")
-logger.info("Test log message")
-app = FastAPI()
-
-API_KEY = settings.SCRAPER_API_KEY  # read from .env
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("🔌 strtupup event! Connecting to database...")
-     # Optionally test the connection
-    try:
-        logger.info("🔌 Testing DB connection...")
-        init_db()  # Ensure the database is initialized
-        logger.info("🔌 Database connection successful!")
-    except Exception as e:
-        logger.error("❌ Failed to connect to DB:", e)
-    
-@app.get("/health")
-async def health_check():
-    logger.info("/health route called!")
-    return {"status": "ok"}
-
-
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the Job Scraper API!"}
-
-
-class ScrapeRequest(BaseModel):
-    keywords: list[str]
-
-
-@app.post("/scrape")
-async def scrape_jobs(
-    payload: ScrapeRequest,
-    x_api_key: Optional[str] = Header(None),  # 👈 optional
-):
-    if x_api_key != settings.SCRAPER_API_KEY:
-        logger.warning("Unauthorized access attempt to /scrape")
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    logger.info("/scrape route authorized")
-    logger.info("/scrape route called!")
-    logger.info(f"Received scrape request with keywords: {payload.keywords}")
-    redis = RedisService()
-    db: Session = next(get_db())
-    scraper = JobScraperService(redis, db)
-    
-    # Call the scrape method and get the result
-    scrape_result = scraper.scrape(payload.keywords)
-    
-    # Return the result to the user
-    return {
-        "message": "Scraping completed.",
-        "keywords": payload.keywords,
-        "results": scrape_result,  # Include the detailed counts
-    }
-
-
-@app.get("/health/db")
-async def check_db_connection(db: Session = Depends(get_db)):
-    logger.info("/health/db route called!")
-    logger.info("Checking database connection...")
-    try:
-        result = db.execute(text("SELECT 1"))
-        return {"db": "connected"}
-        result = db.execute(text("SELECT * from JOB_POSTS limit 1"))
-
-        rows = result.fetchall()
-        # Convert to list of dicts
-        rows_as_dicts = [dict(row._mapping) for row in rows]
-        logger.info(f"Database connection successful! Rows: {rows_as_dicts}")
-        return {"db": "connected", "result": rows_as_dicts}
-
-    except Exception as e:
-        logger.error(f"Database connection failed: {str(e)}")
-        return {"db": "error", "details": str(e)}
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+
+from fastapi import FastAPI, Request,Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import text
+from app.database import get_db, session_scope
+from app.redis_service import RedisService
+from app.job_queue import FINISHED_STATUSES, ScrapeJobQueue
+from app.job_export import (
+    EXPORT_FORMATS,
+    csv_chunks,
+    export_high_water,
+    gzip_chunks,
+    iter_job_posts,
+    ndjson_chunks,
+)
+from app.job_repository import JobPostRepository
+from app.schemas.job_post_schema import JobPostOut, JobPostPage
+from app.scheduler import KeywordScheduler
+from app.search_cache import SearchCache
+from app.search_guard import SearchGuard
+from app.resources import close_resources, pool_stats
+from app.link_index import KnownLinkIndex
+from app.metrics import render_metrics
+from app.sources.base import SourceHealth
+from app.config import settings
+from app.log_config import logger
+from typing import Optional
+
+
+def attach_debugger() -> None:
+    """Listen for a debugpy client (DEBUGPY_ENABLED); blocks only with DEBUGPY_WAIT."""
+    import debugpy
+
+    debugpy.listen(("0.0.0.0", settings.DEBUGPY_PORT))
+    if settings.DEBUGPY_WAIT:
+        print("🪲 Waiting for debugger to attach...")
+        debugpy.wait_for_client()
+
+
+if settings.DEBUGPY_ENABLED:
+    attach_debugger()
+
+logger.info("Starting FastAPI app...")
+app = FastAPI()
+
+API_KEY = settings.SCRAPER_API_KEY  # read from .env
+
+# Schema management (`python -m app.migrations`) and the dedup index warm load
+# (worker start-up) run outside the API process, so start-up touches neither
+# Postgres nor Redis; the engine and Redis pools are created on first use.
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("🔌 shutdown event! Closing connection pools...")
+    close_resources()
+
+
+@app.get("/health")
+async def health_check():
+    logger.info("/health route called!")
+    return {"status": "ok"}
+
+
+@app.get("/")
+async def root():
+    return {"message": "Welcome to the Job Scraper API!"}
+
+
+class ScrapeRequest(BaseModel):
+    keywords: list[str]
+
+
+def verify_api_key(x_api_key: Optional[str] = Header(None)):  # 👈 optional
+    if x_api_key != settings.SCRAPER_API_KEY:
+        logger.warning("Unauthorized access attempt to /scrape")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+@app.post("/scrape", status_code=202, dependencies=[Depends(verify_api_key)])
+def scrape_jobs(payload: ScrapeRequest):
+    logger.info("/scrape route authorized")
+    logger.info(f"Received scrape request with keywords: {payload.keywords}")
+    queue = ScrapeJobQueue(RedisService())
+    submission = queue.submit(payload.keywords)
+
+    # Return the job id right away; workers run the scrape in the background
+    return {
+        "message": "Scraping queued.",
+        "keywords": payload.keywords,
+        **submission,
+    }
+
+
+@app.get("/scrape/{job_id}", dependencies=[Depends(verify_api_key)])
+def get_scrape_job(job_id: str):
+    job = ScrapeJobQueue(RedisService()).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job
+
+
+@app.get("/scrape/{job_id}/events", dependencies=[Depends(verify_api_key)])
+async def stream_scrape_job(job_id: str):
+    queue = ScrapeJobQueue(RedisService())
+    if await run_in_threadpool(queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+
+    async def events():
+        # Server-sent events: one message per job version until the job finishes
+        last_version = -1
+        while True:
+            job = await run_in_threadpool(queue.get, job_id)
+            if job is None:
+                break
+            if job["version"] != last_version:
+                last_version = job["version"]
+                yield f"data: {json.dumps(job)}\n\n"
+            if job["status"] in FINISHED_STATUSES:
+                break
+            await asyncio.sleep(settings.SCRAPE_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/schedule", dependencies=[Depends(verify_api_key)])
+def list_scheduled_keywords():
+    scheduler = KeywordScheduler(RedisService())
+    return {
+        "keywords": scheduler.keywords(),
+        "calls_today": scheduler.calls_today(),
+        "daily_quota": scheduler.daily_quota,
+    }
+
+
+@app.post("/schedule/keywords", status_code=201, dependencies=[Depends(verify_api_key)])
+def schedule_keywords(payload: ScrapeRequest):
+    added = KeywordScheduler(RedisService()).add_keywords(payload.keywords)
+    logger.info(f"Scheduled keywords added: {added}")
+    return {"added": added}
+
+
+@app.delete("/schedule/keywords/{keyword}", status_code=204, dependencies=[Depends(verify_api_key)])
+def unschedule_keyword(keyword: str):
+    if not KeywordScheduler(RedisService()).remove_keyword(keyword):
+        raise HTTPException(status_code=404, detail="Keyword is not scheduled")
+    return Response(status_code=204)
+
+
+@app.get("/jobs", response_model=JobPostPage, dependencies=[Depends(verify_api_key)])
+def list_jobs(
+    request: Request,
+    keywords: Optional[list[str]] = Query(None),
+    company: Optional[str] = None,
+    location: Optional[str] = None,
+    validated: Optional[bool] = None,
+    scraped_from: Optional[datetime] = None,
+    scraped_to: Optional[datetime] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    try:
+        posts, next_cursor = JobPostRepository(db).page(
+            cursor=cursor,
+            limit=limit,
+            keywords=keywords,
+            company=company,
+            location=location,
+            validated=validated,
+            scraped_from=scraped_from,
+            scraped_to=scraped_to,
+            query=q,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page = JobPostPage(
+        items=[JobPostOut.model_validate(post) for post in posts], next_cursor=next_cursor
+    )
+    body = page.model_dump_json().encode()
+
+    # Polling clients send the ETag back and get an empty 304 while the page is unchanged
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/jobs/export", dependencies=[Depends(verify_api_key)])
+def export_jobs(
+    export_format: str = Query(
+        EXPORT_FORMATS[0], alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"
+    ),
+    gzip: bool = False,
+    since: int = Query(0, ge=0),
+):
+    # Snapshot the upper bound (a transaction id) so the export is consistent and
+    # resumable from it even while workers are still inserting
+    with session_scope() as db:
+        upto = export_high_water(db, since)
+
+    def body():
+        # Own session: the request's dependencies are closed before streaming starts
+        with session_scope() as db:
+            batches = iter_job_posts(db, since=since, upto=upto)
+            chunks = ndjson_chunks(batches) if export_format == "ndjson" else csv_chunks(batches)
+            yield from gzip_chunks(chunks) if gzip else chunks
+
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    filename = f"job_posts.{export_format}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Next-Since": str(upto),  # Pass as `since` to export only newer rows next time
+    }
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+
+@app.get("/metrics")
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.get("/health/pools")
+def connection_pool_stats():
+    logger.info("/health/pools route called!")
+    return pool_stats()
+
+
+@app.get("/health/dedup-index")
+def dedup_index_stats():
+    logger.info("/health/dedup-index route called!")
+    return KnownLinkIndex(RedisService().get_client()).stats()
+
+
+@app.get("/health/search-cache")
+def search_cache_stats():
+    logger.info("/health/search-cache route called!")
+    return SearchCache(RedisService().get_raw_client()).stats()
+
+
+@app.get("/health/sources")
+def source_health_stats():
+    logger.info("/health/sources route called!")
+    return {
+        "enabled": settings.SCRAPE_SOURCES,
+        "sources": SourceHealth(RedisService().get_client()).all(),
+        "custom_search": SearchGuard(RedisService().get_client()).stats(),
+    }
+
+
+@app.get("/health/db")
+async def check_db_connection(db: Session = Depends(get_db)):
+    logger.info("/health/db route called!")
+    logger.info("Checking database connection...")
+    try:
+        result = db.execute(text("SELECT 1"))
+        return {"db": "connected"}
+        result = db.execute(text("SELECT * from JOB_POSTS limit 1"))
+
+        rows = result.fetchall()
+        # Convert to list of dicts
+        rows_as_dicts = [dict(row._mapping) for row in rows]
+        logger.info(f"Database connection successful! Rows: {rows_as_dicts}")
+        return {"db": "connected", "result": rows_as_dicts}
+
+    except Exception as e:
+        logger.error(f"Database connection failed: {str(e)}")
+        return {"db": "error", "details": str(e)}
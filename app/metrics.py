@@ -0,0 +1,183 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+import redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from redis.client import Pipeline
+from sqlalchemy import event
+
+from app.config import settings
+from app.log_config import logger
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+SEARCH_PAGE_SECONDS = Histogram(
+    "jobscraper_search_page_seconds",
+    "Custom Search API latency per results page",
+    buckets=_SLOW_BUCKETS,
+)
+SEARCH_API_CALLS = Counter(
+    "jobscraper_search_api_calls_total", "Custom Search API calls made (quota used)"
+)
+SEARCH_API_ERRORS = Counter(
+    "jobscraper_search_api_errors_total", "Failed Custom Search calls by error kind", ["kind"]
+)
+SEARCH_CACHE_LOOKUPS = Counter(
+    "jobscraper_search_cache_lookups_total", "Search page cache lookups", ["result"]
+)
+DB_STATEMENT_SECONDS = Histogram(
+    "jobscraper_db_statement_seconds",
+    "Database statement latency",
+    ["operation"],
+    buckets=_FAST_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "jobscraper_redis_command_seconds",
+    "Redis command (or pipeline) latency",
+    ["command"],
+    buckets=_FAST_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "jobscraper_stage_seconds",
+    "Time spent per scrape stage",
+    ["stage"],
+    buckets=_SLOW_BUCKETS,
+)
+KEYWORD_SCRAPE_SECONDS = Histogram(
+    "jobscraper_keyword_scrape_seconds",
+    "End-to-end scrape duration per keyword (search through persistence)",
+    buckets=_SLOW_BUCKETS,
+)
+JOBS_PROCESSED = Counter("jobscraper_jobs_total", "Scraped jobs by outcome", ["outcome"])
+KEYWORD_CLAIMS = Counter(
+    "jobscraper_keyword_claims_total", "Keyword scrape lease claims by result", ["result"]
+)
+SOURCE_SECONDS = Histogram(
+    "jobscraper_source_seconds",
+    "Duration of one job source's search per scrape",
+    ["source"],
+    buckets=_SLOW_BUCKETS,
+)
+SOURCE_RUNS = Counter(
+    "jobscraper_source_runs_total", "Job source runs by outcome", ["source", "outcome"]
+)
+
+# Per-request stage breakdown, only collected when profiling is enabled
+_profile: contextvars.ContextVar[dict | None] = contextvars.ContextVar("profile", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a scrape stage into STAGE_SECONDS and, when profiling, the request profile."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage=name).observe(elapsed)
+        profile = _profile.get()
+        if profile is not None:
+            profile[name] = profile.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def profiled(label: str):
+    """
+    Collect a stage breakdown for everything inside the block when PROFILE_STAGES is on.
+
+    Yields the breakdown dict (None when profiling is off) and logs it on exit.
+    """
+    if not settings.PROFILE_STAGES:
+        yield None
+        return
+    profile: dict = {}
+    token = _profile.set(profile)
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile["total"] = time.perf_counter() - started
+        _profile.reset(token)
+        breakdown = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in profile.items())
+        logger.info(f"⏱️ Stage breakdown for {label}: {breakdown}")
+
+
+def instrument_engine(engine) -> None:
+    """Record every SQL statement's latency, labelled by its leading keyword."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+        DB_STATEMENT_SECONDS.labels(operation=operation).observe(elapsed)
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command="PIPELINE").observe(
+                time.perf_counter() - started
+            )
+
+
+class InstrumentedRedis(redis.Redis):
+    """redis.Redis that records per-command latency."""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(command=str(args[0]).upper()).observe(
+                time.perf_counter() - started
+            )
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+def _registry():
+    # In prometheus multiprocess mode every process writes its own files; aggregate them
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus exposition payload and its content type."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a finished process's live gauges in multiprocess mode (no-op otherwise)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve /metrics on its own port, for processes without an HTTP app (workers)."""
+    start_http_server(port, registry=_registry())
+    logger.info(f"📈 Metrics served on :{port}/metrics")
@@ -0,0 +1,137 @@
+"""
+Versioned schema migrations for job_posts.
+
+    python -m app.migrations
+
+`Base.metadata.create_all` only creates missing tables, so columns and indexes
+added to an existing table are applied here. Each migration runs once, in its
+own transaction, and is recorded in `schema_migrations`.
+"""
+
+from sqlalchemy import text
+
+from app.log_config import logger
+from app.models.JobPost import SEARCH_VECTOR_EXPRESSION
+
+MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (
+        1,
+        "Read API indexes and full-text search column",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_scraped_at_id "
+            "ON job_posts (scraped_at DESC, id DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_keywords ON job_posts USING gin (keywords)",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_company_lower ON job_posts (lower(company))",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_location_lower "
+            "ON job_posts (lower(location))",
+            "ALTER TABLE job_posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_search_vector "
+            "ON job_posts USING gin (search_vector)",
+        ],
+    ),
+    (
+        2,
+        "Job detail enrichment tracking",
+        [
+            "ALTER TABLE job_posts ADD COLUMN IF NOT EXISTS enriched_at timestamp",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_enrichment_pending "
+            "ON job_posts (id DESC) WHERE enriched_at IS NULL",
+        ],
+    ),
+    (
+        3,
+        "Monthly-partitioned archive of expired job posts (see app.retention)",
+        [
+            "CREATE TABLE IF NOT EXISTS job_posts_archive ("
+            "id integer NOT NULL, title varchar NOT NULL, snippet varchar, link varchar, "
+            "posted_time timestamp, keywords varchar[], scraped_at timestamp NOT NULL, "
+            "location varchar, source varchar NOT NULL, is_user_reported boolean, "
+            "company varchar, validated boolean NOT NULL, validated_date timestamp, "
+            "requirements text, description text, responsibilities text, "
+            "enriched_at timestamp, archived_at timestamp NOT NULL DEFAULT now(), "
+            "PRIMARY KEY (id, scraped_at)"
+            ") PARTITION BY RANGE (scraped_at)",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_archive_link ON job_posts_archive (link)",
+        ],
+    ),
+    (
+        4,
+        "Track when each posting was last found, for retention",
+        [
+            "ALTER TABLE job_posts ADD COLUMN IF NOT EXISTS last_seen_at timestamp",
+            "UPDATE job_posts SET last_seen_at = scraped_at WHERE last_seen_at IS NULL",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_last_seen_at ON job_posts (last_seen_at)",
+            "ALTER TABLE job_posts_archive ADD COLUMN IF NOT EXISTS last_seen_at timestamp",
+        ],
+    ),
+    (
+        5,
+        "Enrichment retry backoff",
+        [
+            "ALTER TABLE job_posts "
+            "ADD COLUMN IF NOT EXISTS enrich_attempts integer NOT NULL DEFAULT 0, "
+            "ADD COLUMN IF NOT EXISTS enrich_retry_at timestamp",
+            "ALTER TABLE job_posts_archive "
+            "ADD COLUMN IF NOT EXISTS enrich_attempts integer NOT NULL DEFAULT 0, "
+            "ADD COLUMN IF NOT EXISTS enrich_retry_at timestamp",
+        ],
+    ),
+    (
+        6,
+        "Inserting transaction id as the export cursor (see app.job_export)",
+        [
+            # Rows stored so far count as one old transaction: the first export covers them
+            "ALTER TABLE job_posts ADD COLUMN IF NOT EXISTS insert_xid bigint DEFAULT 0",
+            "ALTER TABLE job_posts "
+            "ALTER COLUMN insert_xid SET DEFAULT pg_current_xact_id()::text::bigint",
+            "CREATE INDEX IF NOT EXISTS ix_job_posts_insert_xid_id ON job_posts (insert_xid, id)",
+            "ALTER TABLE job_posts_archive ADD COLUMN IF NOT EXISTS insert_xid bigint",
+        ],
+    ),
+]
+
+# Serializes concurrent migrators (API replicas and workers starting together)
+_ADVISORY_LOCK_ID = 4_711_001
+
+
+def run_migrations(engine) -> list[int]:
+    """Apply pending migrations in order. Returns the versions applied."""
+    applied = []
+    with engine.connect() as conn:
+        # Session-level lock, held on this connection until released below
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+        conn.commit()
+        try:
+            conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version integer PRIMARY KEY, description text NOT NULL, "
+                    "applied_at timestamptz NOT NULL DEFAULT now())"
+                )
+            )
+            done = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+            conn.commit()
+            for version, description, statements in MIGRATIONS:
+                if version in done:
+                    continue
+                logger.info(f"Applying migration {version}: {description}")
+                for statement in statements:
+                    conn.execute(text(statement))
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                    {"v": version, "d": description},
+                )
+                conn.commit()
+                applied.append(version)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            conn.commit()
+    return applied
+
+
+if __name__ == "__main__":
+    from app.init_db import init_db
+
+    init_db()
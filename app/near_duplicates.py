@@ -0,0 +1,132 @@
+import hashlib
+import re
+
+import numpy as np
+
+from app.config import settings
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """Word n-grams of the normalized text (the whole text if it is shorter)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+            for s in shingles(text)
+        ),
+        dtype=np.int64,
+    )
+
+
+class NearDuplicateDetector:
+    """
+    MinHash + LSH near-duplicate detection over job title and snippet text.
+
+    Signatures for a whole batch are computed with numpy: one (permutations x
+    shingles) matrix per document instead of a Python loop per hash function.
+    LSH banding proposes candidate pairs, and pairs whose estimated Jaccard
+    similarity reaches the threshold are merged into clusters.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.NEAR_DUP_THRESHOLD,
+        num_perm: int = settings.NEAR_DUP_NUM_PERM,
+        bands: int = settings.NEAR_DUP_BANDS,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # a*h + b stays below 2**63 because a, b < 2**31 and h < 2**32
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.int64)
+
+    @staticmethod
+    def text_of(title: str | None, snippet: str | None) -> str:
+        return f"{title or ''} {snippet or ''}"
+
+    def signatures(self, texts: list[str], chunk_size: int = 1000) -> np.ndarray:
+        """MinHash signatures, one uint32 row per text (all-max for empty texts)."""
+        result = np.full((len(texts), self.num_perm), _MERSENNE_PRIME, dtype=np.uint32)
+        for start in range(0, len(texts), chunk_size):
+            hash_lists = [_shingle_hashes(text) for text in texts[start : start + chunk_size]]
+            lengths = np.array([hashes.size for hashes in hash_lists])
+            present = np.flatnonzero(lengths)
+            if not present.size:
+                continue
+            flat = np.concatenate([hash_lists[i] for i in present])
+            offsets = np.concatenate(([0], np.cumsum(lengths[present])[:-1]))
+            # (num_perm, total shingles) in one shot, then the minimum per document
+            permuted = (self._a * flat[np.newaxis, :] + self._b) % _MERSENNE_PRIME
+            result[start + present] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return result
+
+    def clusters(self, keys: list, texts: list[str], apart: list | None = None) -> list[list]:
+        """
+        Group keys whose texts are near-duplicates.
+
+        Args:
+            keys (list): One key per text, returned in the clusters.
+            texts (List[str]): Title + snippet text per key.
+            apart (list, optional): Per-key group (e.g. the posting's site); two
+                keys of the same group never end up in one cluster.
+
+        Returns:
+            List[list]: Clusters with two or more keys, each in input order.
+        """
+        signatures = self.signatures(texts)
+        parent = list(range(len(keys)))
+        # Groups already present in each cluster, by root
+        members = [{group} for group in apart] if apart is not None else None
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        present = np.flatnonzero((signatures != _MERSENNE_PRIME).any(axis=1))
+        if present.size < 2:
+            return []
+        for band in range(self.bands):
+            band_rows = signatures[present, band * self.rows : (band + 1) * self.rows]
+            # Documents sharing a band bucket are candidates; compare each to the
+            # bucket's first member
+            _, first, inverse = np.unique(
+                band_rows, axis=0, return_index=True, return_inverse=True
+            )
+            anchors = present[first[inverse.ravel()]]
+            candidates = np.flatnonzero(anchors != present)
+            if not candidates.size:
+                continue
+            similarity = np.mean(
+                signatures[anchors[candidates]] == signatures[present[candidates]], axis=1
+            )
+            for index in candidates[similarity >= self.threshold]:
+                root, anchor_root = find(present[index]), find(anchors[index])
+                if root == anchor_root:
+                    continue
+                if members is not None:
+                    if members[root] & members[anchor_root]:
+                        continue
+                    members[anchor_root] |= members[root]
+                parent[root] = anchor_root
+
+        groups: dict[int, list] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(find(index), []).append(key)
+        return [group for group in groups.values() if len(group) > 1]
@@ -0,0 +1,107 @@
+import math
+import re
+from dataclasses import dataclass, field
+from urllib.parse import quote_plus
+
+from app.config import settings
+from app.google_search import GoogleSearch
+from app.job_validation import SearchHit
+
+_PAGE_SIZE = 10
+_MAX_RESULTS = 100  # Custom Search serves at most this many results per query
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@dataclass
+class QueryPlan:
+    groups: list[list[str]] = field(default_factory=list)
+    api_calls_planned: int = 0
+    api_calls_naive: int = 0
+    results_planned: int = 0
+    results_naive: int = 0
+
+    @property
+    def api_calls_saved(self) -> int:
+        return self.api_calls_naive - self.api_calls_planned
+
+    def summary(self) -> dict:
+        return {
+            "queries": len(self.groups),
+            "api_calls_planned": self.api_calls_planned,
+            "api_calls_naive": self.api_calls_naive,
+            "api_calls_saved": self.api_calls_saved,
+            # Below results_naive when packed groups hit the per-query result cap
+            "results_planned": self.results_planned,
+            "results_naive": self.results_naive,
+        }
+
+
+class QueryPlanner:
+    """
+    Packs keywords into as few OR-clause Custom Search queries as the limits allow,
+    and maps each returned item back to the keywords it matches.
+    """
+
+    def __init__(
+        self,
+        max_query_length: int = settings.SEARCH_MAX_QUERY_LENGTH,
+        max_keywords_per_query: int = settings.SEARCH_MAX_KEYWORDS_PER_QUERY,
+        results_per_keyword: int = settings.SEARCH_RESULTS_PER_KEYWORD,
+    ) -> None:
+        self.max_query_length = max_query_length
+        self.max_keywords_per_query = max_keywords_per_query
+        self.results_per_keyword = results_per_keyword
+
+    def num_results(self, group: list[str]) -> int:
+        """Result budget of a query: every keyword's own budget, up to the API's cap."""
+        return min(_MAX_RESULTS, self.results_per_keyword * len(group))
+
+    def _fits(self, group: list[str]) -> bool:
+        if len(group) > self.max_keywords_per_query:
+            return False
+        return len(quote_plus(GoogleSearch.compose_query(group))) <= self.max_query_length
+
+    def plan(self, keywords: list[str]) -> QueryPlan:
+        """
+        Greedily pack keywords, in order, into groups that fit one query each.
+
+        A keyword too long to share a query still gets a query of its own.
+        """
+        plan = QueryPlan()
+        group: list[str] = []
+        for keyword in keywords:
+            if group and not self._fits(group + [keyword]):
+                plan.groups.append(group)
+                group = []
+            group.append(keyword)
+        if group:
+            plan.groups.append(group)
+
+        pages_per_keyword = math.ceil(self.results_per_keyword / _PAGE_SIZE)
+        plan.api_calls_naive = len(keywords) * pages_per_keyword
+        plan.api_calls_planned = sum(
+            math.ceil(self.num_results(group) / _PAGE_SIZE) for group in plan.groups
+        )
+        plan.results_naive = len(keywords) * self.results_per_keyword
+        plan.results_planned = sum(self.num_results(group) for group in plan.groups)
+        return plan
+
+    @staticmethod
+    def attribute(item: SearchHit, group: list[str]) -> list[str]:
+        """
+        Return the keywords of `group` whose words all appear in the item's title/snippet.
+
+        Google may match a keyword in the page body only; such items are kept but
+        credited to no keyword (an empty list), so they neither tag the stored
+        post with keywords it was not found for nor count towards keyword yield.
+        """
+        if len(group) == 1:
+            return list(group)
+        text = f"{item.title or ''} {item.snippet or ''}".lower()
+        words = set(_TOKEN_RE.findall(text))
+        matched = [
+            keyword
+            for keyword in group
+            if all(token in words for token in _TOKEN_RE.findall(keyword.lower()))
+        ]
+        return matched
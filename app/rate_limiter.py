@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request consumes one token and waits when the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        if rate <= 0:
+            raise ValueError("Rate must be a positive number.")
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive integer.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class RequestLimiter:
+    """
+    Combines a global concurrency cap with a token bucket.
+
+    Usage:
+        async with limiter:
+            await client.get(...)
+    """
+
+    def __init__(self, max_concurrency: int, rate: float, burst: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate, burst)
+
+    async def __aenter__(self) -> "RequestLimiter":
+        await self._semaphore.acquire()
+        try:
+            await self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._semaphore.release()
@@ -1,22 +1,180 @@
-# app/services/redis_service.py
-import redis
-from app.config import settings
-
-
-class RedisService:
-    def __init__(self, host=None, port=None, db=0):
-        self.client = redis.Redis(
-            host=host or settings.REDIS_HOST,
-            port=port or settings.REDIS_PORT,
-            db=db,
-            decode_responses=True,
-        )
-
-    def was_scraped_recently(self, keyword: str) -> bool:
-        return self.client.exists(f"scraped:{keyword}") == 1
-
-    def mark_as_scraped(self, keyword: str, ttl: int = settings.REDIS_EXPIRATION):
-        self.client.setex(f"scraped:{keyword}", ttl, "1")
-
-    def get_client(self):
-        return self.client  # Optional, if you still want direct access
+# app/services/redis_service.py
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from app.config import settings
+from app.log_config import logger
+from app.metrics import InstrumentedRedis
+from app.resources import get_redis_pool
+
+_LEASE_KEY = "lease:keyword:{}"
+_FENCE_KEY = "lease:fence:{}"  # Counter issuing fencing tokens per keyword
+_FENCE_SEEN_KEY = "lease:fence_seen:{}"  # Newest token whose writes were accepted
+
+# Take the lease if free and issue the next fencing token with it
+_CLAIM_LEASE = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return false
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[1] .. ':' .. token, 'PX', ARGV[2])
+return token
+"""
+_RENEW_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+# Write the scrape marks unless a newer token has already written them
+_FENCED_MARK = """
+local token = tonumber(ARGV[1])
+if token < tonumber(redis.call('GET', KEYS[1]) or '0') then
+    return 0
+end
+redis.call('SET', KEYS[1], token)
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+if ARGV[3] ~= '' then
+    redis.call('SET', KEYS[3], ARGV[3])
+end
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class KeywordLease:
+    keyword: str
+    token: int  # Fencing token: increases with every successful claim of the keyword
+    value: str  # Stored lease value, unique to this holder
+
+
+class RedisService:
+    def __init__(self, host=None, port=None, db=0):
+        if host is None and port is None and db == 0:
+            # Default instance: borrow connections from the process-wide pools
+            self.client = InstrumentedRedis(connection_pool=get_redis_pool(True))
+            self.raw_client = InstrumentedRedis(connection_pool=get_redis_pool(False))
+        else:
+            self._connect(host, port, db)
+        self._claim_lease = self.client.register_script(_CLAIM_LEASE)
+        self._renew_lease = self.client.register_script(_RENEW_LEASE)
+        self._release_lease = self.client.register_script(_RELEASE_LEASE)
+        self._fenced_mark = self.client.register_script(_FENCED_MARK)
+
+    def _connect(self, host, port, db):
+        self.client = InstrumentedRedis(
+            host=host or settings.REDIS_HOST,
+            port=port or settings.REDIS_PORT,
+            db=db,
+            decode_responses=True,
+        )
+        # Binary-safe client for compressed payloads (e.g. the search page cache)
+        self.raw_client = InstrumentedRedis(
+            host=host or settings.REDIS_HOST,
+            port=port or settings.REDIS_PORT,
+            db=db,
+            decode_responses=False,
+        )
+
+    def was_scraped_recently(self, keyword: str) -> bool:
+        return self.client.exists(f"scraped:{keyword}") == 1
+
+    def mark_as_scraped(self, keyword: str, ttl: int = settings.REDIS_EXPIRATION):
+        self.client.setex(f"scraped:{keyword}", ttl, "1")
+
+    def get_high_water_mark(self, keyword: str) -> float | None:
+        """Start time (epoch seconds) of the last completed scrape of the keyword."""
+        value = self.client.get(f"hwm:{keyword}")
+        return float(value) if value is not None else None
+
+    def set_high_water_mark(self, keyword: str, timestamp: float):
+        self.client.set(f"hwm:{keyword}", timestamp)
+
+    def claim_keyword(
+        self, keyword: str, ttl_ms: int = settings.SCRAPE_LEASE_TTL_MS
+    ) -> KeywordLease | None:
+        """
+        Atomically lease a keyword for scraping (SET NX PX with a fencing token).
+
+        Returns:
+            KeywordLease | None: The lease, or None while another worker holds it.
+        """
+        owner = uuid.uuid4().hex
+        token = self._claim_lease(
+            keys=[_LEASE_KEY.format(keyword), _FENCE_KEY.format(keyword)], args=[owner, ttl_ms]
+        )
+        if token is None:
+            return None
+        return KeywordLease(keyword, int(token), f"{owner}:{token}")
+
+    def renew_lease(self, lease: KeywordLease, ttl_ms: int = settings.SCRAPE_LEASE_TTL_MS) -> bool:
+        """Extend a lease still held by its owner; False once it expired or was taken over."""
+        key = _LEASE_KEY.format(lease.keyword)
+        return bool(self._renew_lease(keys=[key], args=[lease.value, ttl_ms]))
+
+    def release_lease(self, lease: KeywordLease) -> bool:
+        key = _LEASE_KEY.format(lease.keyword)
+        return bool(self._release_lease(keys=[key], args=[lease.value]))
+
+    @contextmanager
+    def keep_leases_alive(
+        self, leases: list[KeywordLease], ttl_ms: int = settings.SCRAPE_LEASE_TTL_MS
+    ):
+        """
+        Renew the leases every third of their TTL until the block exits.
+
+        Yields the set of keywords whose lease was lost along the way.
+        """
+        stop = threading.Event()
+        lost: set[str] = set()
+
+        def renew():
+            while not stop.wait(ttl_ms / 3000):
+                for lease in leases:
+                    if lease.keyword not in lost and not self.renew_lease(lease, ttl_ms):
+                        lost.add(lease.keyword)
+                        logger.warning(f"Lost the scrape lease on '{lease.keyword}'")
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        if leases:
+            renewer.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            if leases:
+                renewer.join()
+
+    def mark_scraped_fenced(
+        self,
+        lease: KeywordLease,
+        high_water_mark: float | None = None,
+        ttl: int = settings.REDIS_EXPIRATION,
+    ) -> bool:
+        """
+        mark_as_scraped (and set_high_water_mark) guarded by the lease's fencing token.
+
+        Rejected, returning False, when a newer lease of the keyword already wrote
+        its marks, so a stalled holder cannot roll the high-water mark back.
+        """
+        keyword = lease.keyword
+        return bool(
+            self._fenced_mark(
+                keys=[_FENCE_SEEN_KEY.format(keyword), f"scraped:{keyword}", f"hwm:{keyword}"],
+                args=[lease.token, ttl, "" if high_water_mark is None else high_water_mark],
+            )
+        )
+
+    def get_client(self):
+        return self.client  # Optional, if you still want direct access
+
+    def get_raw_client(self):
+        return self.raw_client
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import redis
+
+from app.config import settings
+from app.log_config import logger
+
+if TYPE_CHECKING:
+    import requests
+
+# Process-wide shared clients, created on first use and closed by close_resources()
+_redis_pools: dict[bool, redis.ConnectionPool] = {}
+_http_session: requests.Session | None = None
+
+
+def get_redis_pool(decode_responses: bool = True) -> redis.ConnectionPool:
+    """Shared Redis connection pool; text and binary clients get separate pools."""
+    pool = _redis_pools.get(decode_responses)
+    if pool is None:
+        pool = redis.ConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=0,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            decode_responses=decode_responses,
+        )
+        _redis_pools[decode_responses] = pool
+    return pool
+
+
+def use_redis_pools(text: redis.ConnectionPool, binary: redis.ConnectionPool) -> None:
+    """Point every default RedisService at the given pools (e.g. a local stand-in)."""
+    _redis_pools[True] = text
+    _redis_pools[False] = binary
+
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive HTTP session, so pages reuse TLS connections."""
+    global _http_session
+    if _http_session is None:
+        # Only the sync search uses requests; the API process never imports it
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _http_session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        )
+        _http_session.mount("https://", adapter)
+        _http_session.mount("http://", adapter)
+    return _http_session
+
+
+def pool_stats() -> dict:
+    from app.database import get_engine
+
+    pool = get_engine().pool
+    stats = {
+        "db": {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        },
+        "redis": {},
+        "http": {"session_open": _http_session is not None},
+    }
+    for decode_responses, redis_pool in _redis_pools.items():
+        stats["redis"]["text" if decode_responses else "binary"] = {
+            "created": redis_pool._created_connections,
+            "available": len(redis_pool._available_connections),
+            "in_use": len(redis_pool._in_use_connections),
+            "max": redis_pool.max_connections,
+        }
+    return stats
+
+
+def close_resources() -> None:
+    """Release every shared client; safe to call more than once."""
+    global _http_session
+    from app.database import dispose_engine
+
+    for redis_pool in _redis_pools.values():
+        redis_pool.disconnect()
+    _redis_pools.clear()
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+    dispose_engine()
+    logger.info("🔌 Shared DB, Redis and HTTP pools closed")
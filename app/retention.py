@@ -0,0 +1,298 @@
+"""
+Retention and archival for job_posts (hot/cold split).
+
+    python -m app.retention [--dry-run] [--no-compact]
+
+job_posts stays the hot table. It keeps the global unique index on `link` that
+the scrape upserts (`ON CONFLICT (link)`) rely on; a table partitioned on
+scraped_at could not have it, since unique indexes there must include the
+partition key. Postings no scrape has found (`last_seen_at`, refreshed by the
+upserts) for RETENTION_DAYS are moved in batches into job_posts_archive, which
+is partitioned by month on scraped_at. Archive months older than
+ARCHIVE_KEEP_MONTHS are written out as gzip NDJSON files (when
+ARCHIVE_EXPORT_DIR is set) and their partitions dropped. A compaction pass then
+vacuums what was touched and rebuilds the hot indexes once a large share of
+their rows is gone.
+
+A posting found again after it was archived is inserted into job_posts anew.
+Incremental paging stops at the first page of known links, so a posting only
+ever listed past it can still expire while it is live.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import signal
+import time
+from collections.abc import Iterator
+
+from sqlalchemy import column, select, table, text
+
+from app.config import settings
+from app.database import get_engine, session_scope
+from app.job_export import gzip_chunks
+from app.log_config import logger
+from app.models.JobPost import JobPost
+
+_ARCHIVE_TABLE = "job_posts_archive"
+_PARTITION_NAME = "job_posts_archive_y{:%Y}m{:%m}"
+_ARCHIVED_COLUMNS = [c.name for c in JobPost.__table__.columns if c.name != "search_vector"]
+# One instance at a time across worker hosts; migrations use 4_711_001
+_ADVISORY_LOCK_ID = 4_711_002
+
+# Delete a batch of expired rows and insert them into the archive in one statement
+_MOVE_BATCH = """
+WITH moved AS (
+    DELETE FROM job_posts
+    WHERE id IN (
+        SELECT id FROM job_posts
+        WHERE last_seen_at < :cutoff
+        ORDER BY last_seen_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING {columns}
+)
+INSERT INTO job_posts_archive ({columns})
+SELECT {columns} FROM moved
+""".format(columns=", ".join(_ARCHIVED_COLUMNS))
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def month_start(moment: datetime.datetime | datetime.date) -> datetime.date:
+    return datetime.date(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return _PARTITION_NAME.format(month, month)
+
+
+def ensure_partitions(db, first: datetime.date, last: datetime.date) -> list[str]:
+    """Create the monthly archive partitions covering `first` through `last`."""
+    names = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        # Rows are written once and never updated, so pages are packed full
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {_ARCHIVE_TABLE} "
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}') "
+                "WITH (fillfactor = 100)"
+            )
+        )
+        names.append(name)
+        month = add_months(month, 1)
+    db.commit()
+    return names
+
+
+def archive_partitions(db) -> dict[str, datetime.date]:
+    """Existing archive partitions by name, with the month each one holds."""
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            f"WHERE i.inhparent = '{_ARCHIVE_TABLE}'::regclass"
+        )
+    ).scalars()
+    return {
+        name: datetime.datetime.strptime(name[-8:], "y%Ym%m").date() for name in sorted(names)
+    }
+
+
+def archive_expired(
+    db,
+    cutoff: datetime.datetime,
+    batch_size: int = settings.RETENTION_BATCH_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Move job posts last seen before `cutoff` into job_posts_archive.
+
+    Each batch is one `DELETE ... RETURNING` feeding an `INSERT`, committed on its
+    own, so locks stay short and an interrupted run loses nothing.
+
+    Returns:
+        dict: `moved` rows, `batches` and the archive `partitions` written to.
+    """
+    # The archive is partitioned on scraped_at, which is never later than last_seen_at
+    # (give or take the scrape's timezone), so the partitions come from its range
+    expired, oldest, newest = db.execute(
+        text(
+            "SELECT count(*), min(scraped_at), max(scraped_at) FROM job_posts "
+            "WHERE last_seen_at < :cutoff"
+        ),
+        {"cutoff": cutoff},
+    ).one()
+    if oldest is None:
+        return {"moved": 0, "batches": 0, "partitions": []}
+    if dry_run:
+        return {"expired": expired, "oldest": oldest.isoformat()}
+
+    partitions = ensure_partitions(db, oldest, month_start(newest))
+    moved = batches = 0
+    while _running:
+        count = db.execute(
+            text(_MOVE_BATCH), {"cutoff": cutoff, "batch_size": batch_size}
+        ).rowcount
+        db.commit()
+        if not count:
+            break
+        moved += count
+        batches += 1
+        if batches % 20 == 0:
+            logger.info(f"🗄️ Archived {moved} job posts so far")
+    return {"moved": moved, "batches": batches, "partitions": partitions}
+
+
+def _partition_rows(db, name: str, batch_size: int) -> Iterator[bytes]:
+    partition = table(name, *(column(c) for c in _ARCHIVED_COLUMNS + ["archived_at"]))
+    stmt = select(partition).order_by(partition.c.id)
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield b"".join(
+            json.dumps(dict(row._mapping), default=str).encode() + b"\n" for row in rows
+        )
+
+
+def export_old_partitions(
+    db,
+    keep_from: datetime.date,
+    export_dir: str = settings.ARCHIVE_EXPORT_DIR,
+    batch_size: int = settings.EXPORT_BATCH_SIZE,
+) -> list[str]:
+    """
+    Write archive months before `keep_from` to `{export_dir}/{partition}.ndjson.gz`
+    and drop their partitions. Returns the files written.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    written = []
+    for name, month in archive_partitions(db).items():
+        if month >= keep_from:
+            continue
+        path = os.path.join(export_dir, f"{name}.ndjson.gz")
+        # Written under a temporary name: a partial file never looks like an export
+        with open(path + ".tmp", "wb") as output:
+            for chunk in gzip_chunks(_partition_rows(db, name, batch_size)):
+                output.write(chunk)
+        os.replace(path + ".tmp", path)
+        db.execute(text(f"ALTER TABLE {_ARCHIVE_TABLE} DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        logger.info(f"🗄️ Exported archive partition {name} to {path} and dropped it")
+        written.append(path)
+    return written
+
+
+def compact(hot_rows_moved: int, partitions: list[str]) -> dict:
+    """
+    Reclaim what archiving left behind: VACUUM (ANALYZE) the hot table and the
+    archive partitions written to, and rebuild the hot indexes (concurrently, so
+    scrapes keep writing) once the moved rows reach COMPACT_REINDEX_RATIO of it.
+    """
+    steps = []
+    # VACUUM and REINDEX CONCURRENTLY refuse to run inside a transaction block
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (ANALYZE) job_posts"))
+        steps.append("vacuum job_posts")
+        remaining = conn.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'job_posts'::regclass")
+        ).scalar()
+        total = hot_rows_moved + max(remaining or 0, 0)
+        if hot_rows_moved and hot_rows_moved >= settings.COMPACT_REINDEX_RATIO * total:
+            conn.execute(text("REINDEX TABLE CONCURRENTLY job_posts"))
+            steps.append("reindex job_posts")
+        for name in partitions:
+            conn.execute(text(f"VACUUM (FREEZE, ANALYZE) {name}"))
+        if partitions:
+            steps.append(f"vacuum {len(partitions)} archive partitions")
+    return {"steps": steps}
+
+
+def run_retention(db, dry_run: bool = False, compaction: bool = True) -> dict | None:
+    """
+    One retention pass: archive expired posts, export old archive months, compact.
+
+    Returns None when another instance holds the retention lock.
+    """
+    # Session-level lock on a connection of its own: the session hands its
+    # connection back to the pool at every commit
+    with get_engine().connect() as lock_conn:
+        locked = lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID}
+        ).scalar()
+        lock_conn.commit()
+        if not locked:
+            logger.info("Retention already running elsewhere; skipping")
+            return None
+        try:
+            return _run_retention(db, dry_run, compaction)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            lock_conn.commit()
+
+
+def _run_retention(db, dry_run: bool, compaction: bool) -> dict:
+    now = datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(days=settings.RETENTION_DAYS)
+    summary = {"cutoff": cutoff.isoformat()}
+    started = time.perf_counter()
+    summary["archive"] = archive_expired(db, cutoff, dry_run=dry_run)
+    summary["archive"]["seconds"] = round(time.perf_counter() - started, 2)
+    if dry_run:
+        return summary
+    if settings.ARCHIVE_EXPORT_DIR:
+        keep_from = add_months(month_start(now), -settings.ARCHIVE_KEEP_MONTHS)
+        summary["exported"] = export_old_partitions(db, keep_from)
+    moved = summary["archive"]["moved"]
+    if compaction and moved:
+        # Partitions exported in the same pass are gone already
+        existing = archive_partitions(db)
+        partitions = [name for name in summary["archive"]["partitions"] if name in existing]
+        summary["compaction"] = compact(moved, partitions)
+    logger.info(f"🗄️ Retention run: {summary}")
+    return summary
+
+
+def run_retention_loop() -> None:
+    """Run retention every RETENTION_INTERVAL until SIGTERM/SIGINT (a worker pool process)."""
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("🗄️ Retention task started")
+    next_run = time.monotonic()
+    while _running:
+        if time.monotonic() >= next_run:
+            try:
+                with session_scope() as db:
+                    run_retention(db)
+            except Exception as e:
+                logger.exception(f"Retention run failed: {e}")
+            next_run = time.monotonic() + settings.RETENTION_INTERVAL
+        time.sleep(1)
+    logger.info("🗄️ Retention task stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive expired job posts.")
+    parser.add_argument("--dry-run", action="store_true", help="Count expired rows only")
+    parser.add_argument("--no-compact", action="store_true", help="Skip VACUUM/REINDEX")
+    args = parser.parse_args()
+    with session_scope() as db:
+        summary = run_retention(db, dry_run=args.dry_run, compaction=not args.no_compact)
+    logger.info(f"Retention finished: {summary}")
+
+
+if __name__ == "__main__":
+    main()
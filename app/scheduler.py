@@ -0,0 +1,209 @@
+"""
+Scheduled scraping of a registry of keywords.
+
+    python -m app.scheduler
+
+Each keyword's next due time lives in the `schedule:due` sorted set. Any number
+of scheduler replicas can tick concurrently: due keywords are claimed with one
+Lua script that also pushes them out by a lease, so a keyword is handed to
+exactly one replica and is retried if its run never reports back. Claimed
+keywords are submitted as one packed job to the scrape queue.
+
+Refresh intervals follow each keyword's observed yield (new jobs per Custom
+Search call): the schedule's share of the daily Custom Search quota is shared
+out in proportion to yield, so productive keywords are refreshed more often and
+the total planned calls stay within it. Calls are counted by SearchGuard, on
+the same per-Pacific-day counter that every scrape draws from.
+"""
+
+import json
+import random
+import signal
+import time
+
+from app.config import settings
+from app.job_queue import ScrapeJobQueue
+from app.log_config import logger
+from app.redis_service import RedisService
+from app.search_guard import SearchGuard
+
+_DUE_KEY = "schedule:due"  # ZSET keyword -> next due time (epoch seconds)
+_STATS_KEY = "schedule:stats"  # HASH keyword -> JSON yield statistics
+
+# Pop up to ARGV[2] keywords due at ARGV[1] and lease them until ARGV[3]
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, keyword in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[3], keyword)
+end
+return due
+"""
+
+_EMA_ALPHA = 0.3  # Weight of the latest run in the yield/calls averages
+_YIELD_PRIOR = 0.1  # Keeps zero-yield keywords in rotation (at the longest interval)
+_JITTER = 0.1  # +-10% on due times so keywords do not bunch up
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+class KeywordScheduler:
+    def __init__(
+        self,
+        redis_service,
+        queue: ScrapeJobQueue | None = None,
+        quota_share: float = settings.SCHEDULE_QUOTA_SHARE,
+        min_interval: int = settings.SCHEDULE_MIN_INTERVAL,
+        max_interval: int = settings.SCHEDULE_MAX_INTERVAL,
+    ):
+        self.client = redis_service.get_client()
+        self.queue = queue or ScrapeJobQueue(redis_service)
+        self.guard = SearchGuard(self.client)
+        # Calls per day the schedule may plan for; 0 when the quota is unmetered
+        self.daily_quota = int(self.guard.daily_quota * quota_share)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._claim = self.client.register_script(_CLAIM_SCRIPT)
+
+    def add_keywords(self, keywords: list[str], now: float | None = None) -> list[str]:
+        """Register keywords, due right away. Returns the ones that were new."""
+        now = now or time.time()
+        added = []
+        for keyword in dict.fromkeys(keywords):
+            initial = {"yield": None, "calls": None, "runs": 0, "interval": None}
+            if self.client.hsetnx(_STATS_KEY, keyword, json.dumps(initial)):
+                self.client.zadd(_DUE_KEY, {keyword: now}, nx=True)
+                added.append(keyword)
+        return added
+
+    def remove_keyword(self, keyword: str) -> bool:
+        pipe = self.client.pipeline()
+        pipe.hdel(_STATS_KEY, keyword)
+        pipe.zrem(_DUE_KEY, keyword)
+        return bool(pipe.execute()[0])
+
+    def keywords(self) -> list[dict]:
+        """Registered keywords with their statistics, soonest due first."""
+        stats = self.client.hgetall(_STATS_KEY)
+        return [
+            {"keyword": keyword, "next_due": due, **json.loads(stats.get(keyword, "{}"))}
+            for keyword, due in self.client.zrange(_DUE_KEY, 0, -1, withscores=True)
+        ]
+
+    def calls_today(self, now: float | None = None) -> int:
+        """Custom Search calls made today by every scrape, scheduled or not."""
+        return self.guard.used_today(now)
+
+    def claim_due(
+        self, now: float | None = None, limit: int = settings.SCHEDULE_BATCH_SIZE
+    ) -> list[str]:
+        """Atomically take up to `limit` due keywords, leasing them for SCHEDULE_CLAIM_TTL."""
+        now = now or time.time()
+        return self._claim(keys=[_DUE_KEY], args=[now, limit, now + settings.SCHEDULE_CLAIM_TTL])
+
+    def tick(self, now: float | None = None) -> dict | None:
+        """Submit one scrape job for the keywords due now, unless today's quota is spent."""
+        now = now or time.time()
+        if self.daily_quota and self.calls_today(now) >= self.daily_quota:
+            logger.info("Daily Custom Search quota spent; scheduled keywords wait for tomorrow")
+            return None
+        keywords = self.claim_due(now)
+        if not keywords:
+            return None
+        submission = self.queue.submit(keywords)
+        logger.info(f"⏰ Scheduled scrape of {keywords}: {submission}")
+        return submission
+
+    def record_run(self, keywords: list[str], result: dict, now: float | None = None) -> None:
+        """
+        Fold a finished scrape into the yield statistics and reschedule its keywords.
+
+        Args:
+            keywords (List[str]): Keywords the scrape job was submitted with.
+            result (dict): The scrape result, with per-keyword `keyword_stats`.
+        """
+        now = now or time.time()
+        keyword_stats = result.get("keyword_stats") or {}
+        stats = {
+            keyword: json.loads(raw) for keyword, raw in self.client.hgetall(_STATS_KEY).items()
+        }
+        touched = [keyword for keyword in dict.fromkeys(keywords) if keyword in stats]
+        if not touched:
+            return
+        for keyword in touched:
+            entry, observed = stats[keyword], keyword_stats.get(keyword)
+            if observed is None:
+                continue  # Skipped (scraped recently) or failed; rescheduled below
+            entry["runs"] += 1
+            entry["last_run"] = now
+            entry["calls"] = self._ema(entry["calls"], observed["api_calls"])
+            if observed["api_calls"]:
+                entry["yield"] = self._ema(
+                    entry["yield"], observed["added"] / observed["api_calls"]
+                )
+
+        intervals = self.intervals(stats)
+        pipe = self.client.pipeline()
+        for keyword in touched:
+            entry = stats[keyword]
+            entry["interval"] = intervals[keyword]
+            if keyword not in keyword_stats:
+                interval = self.min_interval  # Retry soon instead of waiting a full interval
+            else:
+                interval = intervals[keyword] * random.uniform(1 - _JITTER, 1 + _JITTER)
+            pipe.hset(_STATS_KEY, keyword, json.dumps(entry))
+            pipe.zadd(_DUE_KEY, {keyword: now + interval}, xx=True)
+        pipe.execute()
+
+    def intervals(self, stats: dict[str, dict]) -> dict[str, float]:
+        """
+        Refresh interval (seconds) per keyword from its yield and calls per run.
+
+        Runs per day are proportional to yield and scaled so the planned calls of
+        all keywords add up to the schedule's daily quota, then clamped to the
+        interval bounds (the longest interval wins over the quota). Without a
+        quota every keyword runs at the shortest interval.
+        """
+        if not self.daily_quota:
+            return {keyword: self.min_interval for keyword in stats}
+        default_calls = settings.SEARCH_RESULTS_PER_KEYWORD / 10
+        weights = {
+            keyword: (entry["yield"] or 0.0) + _YIELD_PRIOR for keyword, entry in stats.items()
+        }
+        planned = sum(
+            weights[keyword] * (entry["calls"] or default_calls)
+            for keyword, entry in stats.items()
+        )
+        intervals = {}
+        for keyword in stats:
+            runs_per_day = self.daily_quota * weights[keyword] / planned if planned else 0
+            interval = 86400 / runs_per_day if runs_per_day else self.max_interval
+            intervals[keyword] = min(self.max_interval, max(self.min_interval, interval))
+        return intervals
+
+    @staticmethod
+    def _ema(previous: float | None, value: float) -> float:
+        return value if previous is None else previous + _EMA_ALPHA * (value - previous)
+
+
+def run_scheduler() -> None:
+    """Tick until SIGTERM/SIGINT."""
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    scheduler = KeywordScheduler(RedisService())
+    logger.info("⏰ Keyword scheduler started")
+    while _running:
+        try:
+            scheduler.tick()
+        except Exception as e:
+            logger.exception(f"Scheduler tick failed: {e}")
+        time.sleep(settings.SCHEDULE_TICK_SECONDS)
+    logger.info("⏰ Keyword scheduler stopped")
+
+
+if __name__ == "__main__":
+    run_scheduler()
@@ -1,11 +1,35 @@
-from app.google_search import GoogleSearch
-from app.config import settings
-
-
-def scraper_factory(keyword: str):
-    return GoogleSearch(
-        api_key=settings.GOOGLE_API_KEY,
-        search_engine_id=settings.GOOGLE_SEARCH_ENGINE_ID,
-        client_id=settings.CLIENT_ID,
-        keywords=[keyword],
-    )
+from app.async_google_search import AsyncGoogleSearch
+from app.google_search import GoogleSearch
+from app.config import settings
+
+
+def _as_list(keywords: str | list[str]) -> list[str]:
+    return [keywords] if isinstance(keywords, str) else list(keywords)
+
+
+def scraper_factory(
+    keywords: str | list[str], cache=None, num_results: int | None = None, **options
+) -> GoogleSearch:
+    return GoogleSearch(
+        api_key=settings.GOOGLE_API_KEY,
+        search_engine_id=settings.GOOGLE_SEARCH_ENGINE_ID,
+        client_id=settings.CLIENT_ID,
+        keywords=_as_list(keywords),
+        num_results=num_results or settings.SEARCH_RESULTS_PER_KEYWORD,
+        cache=cache,
+        **options,
+    )
+
+
+def async_scraper_factory(
+    keywords: str | list[str], cache=None, num_results: int | None = None, **options
+) -> AsyncGoogleSearch:
+    return AsyncGoogleSearch(
+        api_key=settings.GOOGLE_API_KEY,
+        search_engine_id=settings.GOOGLE_SEARCH_ENGINE_ID,
+        client_id=settings.CLIENT_ID,
+        keywords=_as_list(keywords),
+        num_results=num_results or settings.SEARCH_RESULTS_PER_KEYWORD,
+        cache=cache,
+        **options,
+    )
@@ -1,123 +1,344 @@
-import datetime
-import pytz
-
-from pydantic import ValidationError
-from app.models.JobPost import JobPost
-from app.scraper_factory import scraper_factory
-from app.schemas.job_post_schema import JobPostCreate
-from app.log_config import logger
-
-
-class JobScraperService:
-    def __init__(self, redis_service, db):
-        self.redis = redis_service
-        # self.google = google_search
-        self.db = db
-
-    def scrape(self, keywords):
-        added_jobs = 0
-        skipped_jobs = 0
-        missing_data_jobs = 0
-        failed_saves = 0  # New counter for failed saves
-
-        for keyword in keywords:
-            if self.redis.was_scraped_recently(keyword):
-                logger.info(f"Keyword '{keyword}' was scraped recently. Skipping...")
-                continue
-
-            scraper = scraper_factory(keyword)
-            results = scraper.search(keyword)
-
-            for result in results:
-                # Extract job details
-                link = result.get("link")
-                title = result.get("title")
-                logger.info(f"Scraped job: {title} - {link}")
-
-                # Increment missing_data_jobs if title or link is missing
-                if not link or not title:
-                    missing_data_jobs += 1
-                    logger.warning(f"Job missing title or link: {result}")
-                    continue
-
-                # Check if the job already exists in the database
-                if self.job_exists(link):
-                    logger.info(f"Job already exists: {link}")
-                    job_post = self.db.query(JobPost).filter(JobPost.link == link).first()
-                    self.update_keywords(job_post, keyword)
-                    skipped_jobs += 1
-                    continue
-
-                # Attempt to save the job post
-                if self.save_job_post(result, keyword):
-                    added_jobs += 1
-                else:
-                    failed_saves += 1  # Increment failed saves if saving fails
-
-            self.redis.mark_as_scraped(keyword)
-
-        # Return all counts to the user
-        return {
-            "added_jobs": added_jobs,
-            "skipped_jobs": skipped_jobs,
-            "missing_data_jobs": missing_data_jobs,
-            "failed_saves": failed_saves,
-        }
-
-    def job_exists(self, url: str) -> bool:
-        # Query the database for the job post by URL
-        job_post = self.db.query(JobPost).filter(JobPost.link == url).first()
-        return job_post is not None
-
-    def update_keywords(self, job_post: JobPost, keyword: str) -> None:
-        # Append the keyword to the job's keywords list if not already present
-        if keyword not in job_post.keywords:
-            logger.info(f"Adding keyword {keyword} to job keywords {job_post.keywords}")
-            job_post.keywords.append(keyword)
-            try:
-                self.db.commit()
-                logger.info(f"Keyword '{keyword}' appended to existing job: {job_post.link}")
-            except Exception as e:
-                logger.error(f"Failed to append keyword '{keyword}' to job: {e}")
-                self.db.rollback()
-
-    def save_job_post(self, result: dict, keyword: str) -> bool:
-        # Validate and transform the input data
-        validated_data = self.validate_job_post_data(result, keyword)
-        if not validated_data:
-            return False  # Skip saving if validation fails
-
-        logger.info(f"Saving job post: {validated_data}")
-        # Create the JobPost object using validated data
-        job_post = JobPost(
-            **validated_data,
-            scraped_at=datetime.datetime.now(pytz.timezone("Israel")),
-        )
-
-        # Add and commit the job post to the database
-        self.db.add(job_post)
-        try:
-            self.db.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Failed to commit job post to the database: {e}")
-            self.db.rollback()  # Roll back the transaction to maintain database integrity
-            return False
-
-    def validate_job_post_data(self, result: dict, keyword: str) -> dict | None:
-        try:
-            # Validate the job post data
-            validated = JobPostCreate(
-                title=result.get("title"),
-                link=result.get("link"),
-                snippet=result.get("snippet"),
-                source="job_scraper_cloud_GoogleSearch",
-                keywords=[keyword],  # Use a list containing only the current keyword
-                validated=False,
-            )
-            validated_data = validated.model_dump()
-            validated_data["link"] = str(validated.link)  # Convert HttpUrl to string
-            return validated_data  # Use model_dump() to convert the Pydantic model to a dictionary
-        except ValidationError as e:
-            logger.error(f"Skipping invalid job: {e}")
-            return None
+import asyncio
+import datetime
+import time
+from collections import Counter, defaultdict
+from typing import Callable
+
+import pytz
+
+from app.canonicalize import posting_site
+from app.job_repository import JobPostRepository
+from app.job_validation import validate_batch
+from app.config import settings
+from app.link_index import KnownLinkIndex
+from app.metrics import (
+    JOBS_PROCESSED,
+    KEYWORD_CLAIMS,
+    KEYWORD_SCRAPE_SECONDS,
+    profiled,
+    stage,
+)
+from app.near_duplicates import NearDuplicateDetector
+from app.query_planner import QueryPlanner
+from app.redis_service import KeywordLease
+from app.search_cache import SearchCache
+from app.search_engine import AsyncSearchEngine
+from app.sources.base import JobSource, SourceContext, SourceHealth, SourceProgress, SourceResult
+from app.sources.registry import build_sources
+from app.log_config import log_sampled, logger
+
+
+class JobScraperService:
+    def __init__(
+        self,
+        redis_service,
+        db,
+        search_engine: AsyncSearchEngine | None = None,
+        planner: QueryPlanner | None = None,
+        sources: list[str] | None = None,
+        source_options: dict | None = None,
+    ):
+        self.redis = redis_service
+        # self.google = google_search
+        self.db = db
+        self.search_engine = search_engine or AsyncSearchEngine()
+        self.planner = planner or QueryPlanner()
+        self.cache = None
+        if settings.SEARCH_CACHE_ENABLED:
+            self.cache = SearchCache(redis_service.get_raw_client())
+        self.near_duplicates = NearDuplicateDetector()
+        self.known_links = None
+        if settings.SEARCH_INCREMENTAL:
+            self.known_links = KnownLinkIndex(redis_service.get_client(), db=db)
+        self.repository = JobPostRepository(db)
+        context = SourceContext(
+            redis_service,
+            db=db,
+            search_engine=self.search_engine,
+            planner=self.planner,
+            cache=self.cache,
+            known_links=self.known_links,
+            options=source_options or {},
+        )
+        self.sources = build_sources(sources or settings.SCRAPE_SOURCES, context)
+        self.health = SourceHealth(redis_service.get_client())
+
+    def scrape(self, keywords, progress: Callable[[dict], None] | None = None):
+        with profiled(f"scrape of {len(keywords)} keywords") as profile:
+            with stage("claim"):
+                leases, failed_claims = self.claim_keywords(keywords)
+            try:
+                with self.redis.keep_leases_alive(list(leases.values())) as lost:
+                    result = self._scrape(keywords, leases, failed_claims, lost, progress)
+            finally:
+                for lease in leases.values():
+                    self.redis.release_lease(lease)
+        if profile is not None:
+            result["profile"] = {name: round(seconds, 4) for name, seconds in profile.items()}
+        return result
+
+    def claim_keywords(self, keywords) -> tuple[dict[str, KeywordLease], list[str]]:
+        """
+        Lease every keyword that is due, so each is scraped by one worker at a time.
+
+        Returns:
+            The leases by keyword, and the keywords another worker is scraping.
+        """
+        leases, failed_claims = {}, []
+        for keyword in dict.fromkeys(keywords):
+            if self.redis.was_scraped_recently(keyword):
+                logger.info(f"Keyword '{keyword}' was scraped recently. Skipping...")
+                continue
+            lease = self.redis.claim_keyword(keyword)
+            if lease is None:
+                logger.warning(f"Keyword '{keyword}' is being scraped elsewhere. Skipping...")
+                failed_claims.append(keyword)
+                continue
+            # The holder we waited out may have finished just before we claimed
+            if self.redis.was_scraped_recently(keyword):
+                self.redis.release_lease(lease)
+                logger.info(f"Keyword '{keyword}' was scraped recently. Skipping...")
+                continue
+            leases[keyword] = lease
+        KEYWORD_CLAIMS.labels(result="claimed").inc(len(leases))
+        KEYWORD_CLAIMS.labels(result="held_elsewhere").inc(len(failed_claims))
+        return leases, failed_claims
+
+    def _scrape(
+        self,
+        keywords,
+        leases: dict[str, KeywordLease],
+        failed_claims: list[str],
+        lost_leases: set[str],
+        progress: Callable[[dict], None] | None = None,
+    ):
+        missing_data_jobs = 0
+        invalid_jobs = 0  # Counted as failed saves, like before
+        counters = {
+            "keywords_total": len(keywords),
+            "keywords_skipped": 0,
+            "keywords_claim_failed": len(failed_claims),
+            "keywords_searched": 0,
+            "results_found": 0,
+        }
+
+        def report(**changes):
+            counters.update(changes)
+            if progress is not None:
+                progress(dict(counters))
+
+        pending_keywords = list(leases)
+        report(keywords_skipped=len(keywords) - len(pending_keywords))
+
+        searched = set()
+
+        def source_progress(done_keywords, found):
+            searched.update(done_keywords)
+            report(
+                keywords_searched=len(searched),
+                results_found=counters["results_found"] + found,
+            )
+
+        # Every source searches all keywords at once, each under its own rate limits
+        started_at = time.time()
+        with stage("search"):
+            outcomes = asyncio.run(self.search_sources(pending_keywords, source_progress))
+
+        failed_keywords = set()
+        for source, outcome in zip(self.sources, outcomes):
+            if isinstance(outcome, Exception):
+                if source.required:
+                    failed_keywords.update(pending_keywords)
+            else:
+                failed_keywords.update(outcome.failed)
+        # Keywords left unmarked (and re-queued by the worker) rather than cached as empty
+        scraped_keywords = [kw for kw in pending_keywords if kw not in failed_keywords]
+
+        rows = []
+        found = defaultdict(Counter)  # keyword -> source name -> hits
+        stored_links = []  # Raw result links, as incremental paging will see them next time
+        scraped_at = datetime.datetime.now(pytz.timezone("Israel"))
+        with stage("validation"):
+            # One stream in source order: on a shared link the earlier source's row wins
+            for source, outcome in zip(self.sources, outcomes):
+                if isinstance(outcome, Exception):
+                    continue
+                hits = []
+                for result in outcome.hits:
+                    # Per-item messages are sampled; each keyword gets a summary below
+                    if log_sampled("scraped_job"):
+                        logger.info(f"Scraped job: {result.title} - {result.link}")
+
+                    # Increment missing_data_jobs if title or link is missing
+                    if not result.link or not result.title:
+                        missing_data_jobs += 1
+                        if log_sampled("missing_data_job"):
+                            logger.warning(f"Job missing title or link: {result}")
+                        continue
+                    hits.append(result)
+                    for keyword in result.keywords:
+                        found[keyword][source.name] += 1
+
+                # One batch validation per source instead of a model per result
+                source_rows, kept = validate_batch(
+                    hits,
+                    [hit.keywords for hit in hits],
+                    source=source.stored_as,
+                    scraped_at=scraped_at,
+                )
+                invalid_jobs += len(hits) - len(kept)
+                rows.extend(source_rows)
+                stored_links.extend(hits[index].link for index in kept)
+
+        with stage("near_duplicates"):
+            self.merge_near_duplicates(rows)
+
+        # Persist the whole request in batched upserts instead of one commit per job
+        with stage("persist"):
+            counts, inserted_links = self.repository.upsert_many_tracked(rows)
+        with stage("bookkeeping"):
+            if self.known_links is not None and not counts["failed"]:
+                self.known_links.add_many(stored_links)
+
+            for keyword in scraped_keywords:
+                # Fenced: a worker whose lease expired mid-scrape cannot overwrite
+                # the marks of the worker that took the keyword over
+                mark = None if counts["failed"] else started_at
+                if not self.redis.mark_scraped_fenced(leases[keyword], mark):
+                    logger.warning(f"Stale lease on '{keyword}'; marks left to its new owner")
+                elif keyword in lost_leases:
+                    logger.warning(f"Lease on '{keyword}' expired mid-scrape; marks still written")
+
+        elapsed = time.time() - started_at
+        for _ in scraped_keywords:
+            KEYWORD_SCRAPE_SECONDS.observe(elapsed)
+        JOBS_PROCESSED.labels(outcome="added").inc(counts["added"])
+        JOBS_PROCESSED.labels(outcome="skipped").inc(counts["skipped"])
+        JOBS_PROCESSED.labels(outcome="failed").inc(counts["failed"] + invalid_jobs)
+        JOBS_PROCESSED.labels(outcome="missing_data").inc(missing_data_jobs)
+        succeeded = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+        off_target = sum(outcome.off_target for outcome in succeeded)
+        JOBS_PROCESSED.labels(outcome="off_target").inc(off_target)
+
+        api_calls = {}
+        for outcome in succeeded:
+            for keyword, calls in outcome.api_calls.items():
+                api_calls[keyword] = api_calls.get(keyword, 0) + calls
+
+        # Return all counts to the user
+        result = {
+            "added_jobs": counts["added"],
+            "skipped_jobs": counts["skipped"],
+            "missing_data_jobs": missing_data_jobs,
+            "failed_saves": counts["failed"] + invalid_jobs,
+            "off_target_results": off_target,  # Dropped by the location matchers
+        }
+        for outcome in succeeded:
+            result.update(outcome.summary)  # e.g. google's query_plan and incremental
+        result["sources"] = {
+            source.name: (
+                {"error": str(outcome)}
+                if isinstance(outcome, Exception)
+                else {"hits": len(outcome.hits), "failed_keywords": len(outcome.failed)}
+            )
+            for source, outcome in zip(self.sources, outcomes)
+        }
+        result["keyword_stats"] = self.keyword_stats(
+            scraped_keywords, api_calls, rows, inserted_links
+        )
+        result["failed_claims"] = failed_claims
+        result["failed_keywords"] = [kw for kw in pending_keywords if kw in failed_keywords]
+        stats = result["keyword_stats"]
+        self.log_keyword_summaries(pending_keywords, failed_keywords, found, stats)
+        report(**result)
+        return result
+
+    @staticmethod
+    def log_keyword_summaries(
+        keywords: list[str], failed: set[str], found: dict[str, Counter], stats: dict
+    ) -> None:
+        """One line per keyword, in place of the per-result messages (fields bound for JSON)."""
+        for keyword in keywords:
+            status = "failed" if keyword in failed else "scraped"
+            entry = stats.get(keyword, {"added": 0, "api_calls": 0})
+            hits = dict(found.get(keyword, {}))
+            logger.bind(
+                keyword=keyword,
+                status=status,
+                hits=hits,
+                added=entry["added"],
+                api_calls=entry["api_calls"],
+            ).info(
+                f"Keyword '{keyword}' {status}: {sum(hits.values())} hits {hits}, "
+                f"{entry['added']} new, {entry['api_calls']:.1f} API calls"
+            )
+
+    async def search_sources(
+        self, keywords: list[str], progress: SourceProgress | None = None
+    ) -> list[SourceResult | Exception]:
+        """
+        Run every source over the keywords concurrently.
+
+        Returns:
+            Each source's result, in order, or the exception that stopped it. Its
+            duration and outcome are recorded in the source health stats either way.
+        """
+        if not keywords:
+            return [SourceResult() for _ in self.sources]
+
+        async def run(source: JobSource) -> SourceResult:
+            started = time.perf_counter()
+            try:
+                outcome = await source.search(keywords, progress)
+            except Exception as e:
+                logger.error(f"Source '{source.name}' failed for keywords {keywords}: {e}")
+                self.health.record(source.name, time.perf_counter() - started, 0, e)
+                raise
+            self.health.record(source.name, time.perf_counter() - started, len(outcome.hits))
+            return outcome
+
+        return await asyncio.gather(
+            *(run(source) for source in self.sources), return_exceptions=True
+        )
+
+    @staticmethod
+    def keyword_stats(
+        keywords: list[str], api_calls: dict[str, float], rows: list[dict], inserted_links: set[str]
+    ) -> dict:
+        """
+        New jobs and API calls per searched keyword (the scheduler's yield signal).
+
+        Calls are the quota-metered ones (Custom Search), a packed query's shared
+        evenly between its keywords; a new job counts for every keyword it was
+        attributed to, whichever source found it.
+        """
+        stats = {
+            keyword: {"added": 0, "api_calls": api_calls.get(keyword, 0)} for keyword in keywords
+        }
+        new_pairs = {
+            (row["link"], keyword)
+            for row in rows
+            if row["link"] in inserted_links
+            for keyword in row["keywords"]
+        }
+        for _, keyword in new_pairs:
+            if keyword in stats:
+                stats[keyword]["added"] += 1
+        return stats
+
+    def merge_near_duplicates(self, rows: list[dict]) -> None:
+        """
+        Point near-duplicate rows (same posting on another ATS or site) at one link.
+
+        Rows from the same ATS (any company's board) or the same site are never
+        merged: there a different link is a different job. The repository then
+        merges each cluster into a single row carrying every keyword, and counts
+        the extra copies as skipped. Every merge is logged, for auditing.
+        """
+        texts = [NearDuplicateDetector.text_of(row["title"], row["snippet"]) for row in rows]
+        sites = [posting_site(row["link"]) for row in rows]
+        for cluster in self.near_duplicates.clusters(list(range(len(rows))), texts, sites):
+            survivor = rows[cluster[0]]["link"]
+            for index in cluster[1:]:
+                logger.info(f"🔗 Near-duplicate merged: {rows[index]['link']} -> {survivor}")
+                rows[index]["link"] = survivor
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+import zlib
+
+from app.config import settings
+from app.log_config import logger
+from app.metrics import SEARCH_CACHE_LOOKUPS
+
+_ENTRY_KEY = "search_cache:page:{}"
+_LRU_KEY = "search_cache:lru"  # ZSET entry key -> last access time
+_SIZES_KEY = "search_cache:sizes"  # HASH entry key -> compressed size
+_BYTES_KEY = "search_cache:bytes"  # Total compressed bytes tracked in the LRU
+_STATS_KEY = "search_cache:stats"
+
+# Drop least-recently-used entries until the cache fits in ARGV[1] bytes
+_EVICT_SCRIPT = """
+local total = tonumber(redis.call('GET', KEYS[1]) or '0')
+local limit = tonumber(ARGV[1])
+local evicted = 0
+while total > limit do
+    local oldest = redis.call('ZPOPMIN', KEYS[2])
+    if #oldest == 0 then break end
+    local size = tonumber(redis.call('HGET', KEYS[3], oldest[1]) or '0')
+    redis.call('HDEL', KEYS[3], oldest[1])
+    redis.call('DEL', oldest[1])
+    total = redis.call('DECRBY', KEYS[1], size)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# Parameters that change which results come back; the API key does not
+_KEY_PARAMS = ("cx", "q", "start", "num", "sort", "dateRestrict")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Redis cache of parsed Custom Search `items` pages.
+
+    Entries are zlib-compressed JSON keyed by the normalized query and page.
+    They expire after a TTL, and the least recently used entries are evicted
+    once the total compressed size exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        client,
+        ttl: int = settings.SEARCH_CACHE_TTL,
+        max_bytes: int = settings.SEARCH_CACHE_MAX_BYTES,
+    ):
+        # Values are compressed bytes, so the client must not decode responses
+        self.client = client
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._evict = self.client.register_script(_EVICT_SCRIPT)
+
+    @staticmethod
+    def cache_key(params: dict) -> str:
+        normalized = {name: params.get(name) for name in _KEY_PARAMS if name in params}
+        if "q" in normalized:
+            normalized["q"] = normalize_query(normalized["q"])
+        digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+        return _ENTRY_KEY.format(digest)
+
+    def get(self, params: dict) -> list[dict] | None:
+        key = self.cache_key(params)
+        blob = self.client.get(key)
+        pipe = self.client.pipeline()
+        if blob is None:
+            SEARCH_CACHE_LOOKUPS.labels(result="miss").inc()
+            pipe.hincrby(_STATS_KEY, "misses", 1)
+            # An expired entry may still be tracked; drop it from the size index
+            pipe.zrem(_LRU_KEY, key)
+            pipe.execute()
+            self._forget_size(key)
+            return None
+        SEARCH_CACHE_LOOKUPS.labels(result="hit").inc()
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.hincrby(_STATS_KEY, "hits", 1)
+        pipe.hincrby(_STATS_KEY, "bytes_read", len(blob))
+        pipe.execute()
+        return json.loads(zlib.decompress(blob))
+
+    def set(self, params: dict, items: list[dict]) -> None:
+        key = self.cache_key(params)
+        blob = zlib.compress(json.dumps(items, separators=(",", ":")).encode())
+        previous = self.client.hget(_SIZES_KEY, key)
+        pipe = self.client.pipeline()
+        pipe.set(key, blob, ex=self.ttl)
+        pipe.zadd(_LRU_KEY, {key: time.time()})
+        pipe.hset(_SIZES_KEY, key, len(blob))
+        pipe.incrby(_BYTES_KEY, len(blob) - int(previous or 0))
+        pipe.hincrby(_STATS_KEY, "bytes_written", len(blob))
+        pipe.execute()
+        evicted = self._evict(keys=[_BYTES_KEY, _LRU_KEY, _SIZES_KEY], args=[self.max_bytes])
+        if evicted:
+            self.client.hincrby(_STATS_KEY, "evictions", evicted)
+            logger.debug(f"Search cache evicted {evicted} entries")
+
+    def _forget_size(self, key: str) -> None:
+        size = self.client.hget(_SIZES_KEY, key)
+        if size is not None:
+            pipe = self.client.pipeline()
+            pipe.hdel(_SIZES_KEY, key)
+            pipe.decrby(_BYTES_KEY, int(size))
+            pipe.execute()
+
+    def stats(self) -> dict:
+        raw = self.client.hgetall(_STATS_KEY)
+        counters = ("hits", "misses", "bytes_read", "bytes_written", "evictions")
+        stats = {name: int(raw.get(name.encode(), 0)) for name in counters}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = self.client.zcard(_LRU_KEY)
+        stats["bytes"] = int(self.client.get(_BYTES_KEY) or 0)
+        stats["max_bytes"] = self.max_bytes
+        return stats
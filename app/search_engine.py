@@ -0,0 +1,88 @@
+import asyncio
+from typing import Callable
+
+import httpx
+
+from app.async_google_search import AsyncGoogleSearch
+from app.config import settings
+from app.job_validation import SearchHit
+from app.log_config import logger
+from app.rate_limiter import RequestLimiter
+
+QueryDoneCallback = Callable[[AsyncGoogleSearch, list[SearchHit] | Exception], None]
+
+
+class AsyncSearchEngine:
+    """
+    Runs many Custom Search queries concurrently over one pooled client.
+
+    All queries share a single RequestLimiter, so the global concurrency cap and
+    request rate hold no matter how many keywords are submitted.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.SEARCH_MAX_CONCURRENCY,
+        rate_per_second: float = settings.SEARCH_RATE_PER_SECOND,
+        burst: int = settings.SEARCH_RATE_BURST,
+        timeout: float = settings.SEARCH_HTTP_TIMEOUT,
+        base_url: str | None = None,  # Override the API endpoint (e.g. a local mock)
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.base_url = base_url
+
+    async def _search(self, scraper, client, limiter, on_query_done) -> list[SearchHit]:
+        if self.base_url:
+            scraper._BASE_URL = self.base_url
+        try:
+            results = await scraper.search(client, limiter)
+        except Exception as e:
+            if on_query_done is not None:
+                on_query_done(scraper, e)
+            raise
+        if on_query_done is not None:
+            on_query_done(scraper, results)
+        return results
+
+    async def search_queries(
+        self,
+        scrapers: list[AsyncGoogleSearch],
+        on_query_done: QueryDoneCallback | None = None,
+    ) -> list[list[SearchHit] | Exception]:
+        """
+        Run all queries concurrently.
+
+        Args:
+            scrapers (List[AsyncGoogleSearch]): One prepared search per query.
+            on_query_done (Callable, optional): Called with each search and its
+                results (or exception) as soon as that query finishes.
+
+        Returns:
+            List[list | Exception]: Results per query, in order, or the exception that
+            stopped that query so the caller can decide whether to retry it.
+        """
+        limiter = RequestLimiter(self.max_concurrency, self.rate_per_second, self.burst)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            outcomes = await asyncio.gather(
+                *(self._search(scraper, client, limiter, on_query_done) for scraper in scrapers),
+                return_exceptions=True,
+            )
+        for scraper, outcome in zip(scrapers, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Search failed for keywords {scraper.keywords}: {outcome}")
+        return outcomes
+
+    def run(
+        self,
+        scrapers: list[AsyncGoogleSearch],
+        on_query_done: QueryDoneCallback | None = None,
+    ) -> list[list[SearchHit] | Exception]:
+        """Synchronous entry point for callers running outside an event loop."""
+        return asyncio.run(self.search_queries(scrapers, on_query_done))
@@ -0,0 +1,256 @@
+"""
+Resilient Custom Search requests.
+
+Classifies API responses (rate limited, daily quota spent, transient or fatal),
+retries with exponential backoff and full jitter (never sooner than the
+server's Retry-After), counts calls against a daily quota shared by all
+workers, and runs a circuit breaker in Redis so that once the API keeps
+failing no worker fires calls that are doomed to fail. Keywords whose search
+fails are left unmarked and re-queued rather than cached as empty.
+"""
+
+import datetime
+import email.utils
+import random
+import time
+
+import pytz
+
+from app.config import settings
+from app.log_config import logger
+
+_QUOTA_KEY = "quota:customsearch:{}"  # Calls made per Pacific day (Google resets then)
+_BREAKER_FAILURES_KEY = "circuit:{}:failures"
+_BREAKER_OPEN_KEY = "circuit:{}:open_until"  # Epoch seconds; absent while closed
+_BREAKER_PROBE_KEY = "circuit:{}:probe"  # Held by the one caller testing a half-open circuit
+
+_QUOTA_TZ = pytz.timezone("America/Los_Angeles")
+_QUOTA_REASONS = {"dailyLimitExceeded", "quotaExceeded", "dailyLimitExceededUnreg"}
+_RATE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+# Count one call against the day's quota unless it is spent
+_ACQUIRE_QUOTA = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+# Closed: allow. Open: deny until ARGV[1] reaches open_until. Half-open: allow one probe
+_BREAKER_ALLOW = """
+local open_until = tonumber(redis.call('GET', KEYS[1]) or '0')
+if open_until == 0 then
+    return 1
+end
+if tonumber(ARGV[1]) < open_until then
+    return 0
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+# Count a failure; open the circuit at the threshold, or at once when half-open
+_BREAKER_FAILURE = """
+local failures = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if failures >= tonumber(ARGV[1]) or redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('SET', KEYS[2], ARGV[2])
+    redis.call('DEL', KEYS[3])
+    return 1
+end
+return 0
+"""
+
+
+class SearchAPIError(Exception):
+    """A Custom Search request that did not return results."""
+
+    retryable = False
+    trips_breaker = True  # Counts towards opening the circuit for every worker
+
+    def __init__(
+        self, message: str, status: int | None = None, retry_after: float | None = None
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitedError(SearchAPIError):
+    retryable = True
+
+
+class TransientSearchError(SearchAPIError):
+    """5xx responses and network errors."""
+
+    retryable = True
+
+
+class QuotaExceededError(SearchAPIError):
+    """The daily quota is spent (by Google's count or the shared counter)."""
+
+
+class BadRequestError(SearchAPIError):
+    """The request itself is wrong (e.g. an invalid query); other requests are fine."""
+
+    trips_breaker = False
+
+
+class CircuitOpenError(SearchAPIError):
+    """Not sent: the circuit is open after repeated failures."""
+
+    trips_breaker = False
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """Retry-After header as seconds, from either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+def classify_response(status: int, payload, headers) -> SearchAPIError | None:
+    """The error a Custom Search response stands for, or None for a usable 200."""
+    if status == 200:
+        return None
+    error = payload.get("error", {}) if isinstance(payload, dict) else {}
+    message = error.get("message") or f"HTTP {status}"
+    reasons = {detail.get("reason") for detail in error.get("errors", [])}
+    retry_after = retry_after_seconds(headers.get("retry-after"))
+    if reasons & _QUOTA_REASONS or (status == 429 and "per day" in message.lower()):
+        return QuotaExceededError(message, status, retry_after)
+    if status == 429 or reasons & _RATE_REASONS:
+        return RateLimitedError(message, status, retry_after)
+    if status >= 500:
+        return TransientSearchError(message, status, retry_after)
+    if status == 400:
+        return BadRequestError(message, status)
+    return SearchAPIError(message, status)  # e.g. 403 with an invalid key
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: float | None = None,
+    base: float = settings.SEARCH_BACKOFF_BASE,
+    cap: float = settings.SEARCH_BACKOFF_MAX,
+) -> float:
+    """Exponential backoff with full jitter, never shorter than Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if retry_after is not None:
+        # A little jitter on top, so workers told the same moment do not all return at once
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+def seconds_until_quota_reset(now: float | None = None) -> float:
+    moment = datetime.datetime.fromtimestamp(now or time.time(), _QUOTA_TZ)
+    midnight = _QUOTA_TZ.localize(
+        datetime.datetime.combine(moment.date() + datetime.timedelta(days=1), datetime.time())
+    )
+    return (midnight - moment).total_seconds()
+
+
+class SearchGuard:
+    """
+    Shared daily quota and circuit breaker for Custom Search calls.
+
+    Call `before_call()` before each API request (it raises instead of letting a
+    doomed call through), then `record(error)` with the classified outcome.
+    """
+
+    def __init__(
+        self,
+        client,
+        name: str = "customsearch",
+        daily_quota: int = settings.SEARCH_DAILY_QUOTA,
+        failure_threshold: int = settings.SEARCH_BREAKER_THRESHOLD,
+        cooldown: float = settings.SEARCH_BREAKER_COOLDOWN,
+    ) -> None:
+        self.client = client
+        self.name = name
+        self.daily_quota = daily_quota
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._acquire_quota = client.register_script(_ACQUIRE_QUOTA)
+        self._allow = client.register_script(_BREAKER_ALLOW)
+        self._failure = client.register_script(_BREAKER_FAILURE)
+
+    def _keys(self) -> list[str]:
+        return [
+            _BREAKER_FAILURES_KEY.format(self.name),
+            _BREAKER_OPEN_KEY.format(self.name),
+            _BREAKER_PROBE_KEY.format(self.name),
+        ]
+
+    @staticmethod
+    def _quota_key(now: float | None = None) -> str:
+        day = datetime.datetime.fromtimestamp(now or time.time(), _QUOTA_TZ)
+        return _QUOTA_KEY.format(day.strftime("%Y%m%d"))
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError or QuotaExceededError unless a call may be made now."""
+        _, open_key, probe_key = self._keys()
+        probe_ms = int(self.cooldown * 1000)
+        if not self._allow(keys=[open_key, probe_key], args=[time.time(), probe_ms]):
+            raise CircuitOpenError(f"Circuit '{self.name}' is open", retry_after=self.blocked_for())
+        if self.daily_quota and not self._acquire_quota(
+            keys=[self._quota_key()], args=[self.daily_quota, 2 * 86400]
+        ):
+            self.trip(seconds_until_quota_reset())
+            raise QuotaExceededError(
+                "Daily Custom Search quota spent", retry_after=seconds_until_quota_reset()
+            )
+
+    def record(self, error: SearchAPIError | None) -> None:
+        """Fold a call's outcome into the breaker (None for success)."""
+        failures_key, open_key, probe_key = self._keys()
+        if error is None:
+            self.client.delete(failures_key, open_key, probe_key)
+            return
+        if isinstance(error, QuotaExceededError):
+            # Google's count wins over ours: nothing more goes out until the reset
+            if self.daily_quota:
+                self.client.set(self._quota_key(), self.daily_quota, ex=2 * 86400)
+            self.trip(seconds_until_quota_reset())
+        elif error.trips_breaker:
+            opened = self._failure(
+                keys=[failures_key, open_key, probe_key],
+                args=[self.failure_threshold, time.time() + self.cooldown, int(self.cooldown * 4)],
+            )
+            if opened:
+                logger.warning(f"⚡ Circuit '{self.name}' open for {self.cooldown:.0f}s: {error}")
+
+    def trip(self, seconds: float) -> None:
+        """Open the circuit for at least `seconds`, e.g. until the quota resets."""
+        _, open_key, _ = self._keys()
+        until = time.time() + seconds
+        current = float(self.client.get(open_key) or 0)
+        if until > current:
+            self.client.set(open_key, until)
+
+    def blocked_for(self) -> float:
+        """Seconds until calls may go out again (0 when the circuit is closed)."""
+        _, open_key, _ = self._keys()
+        return max(0.0, float(self.client.get(open_key) or 0) - time.time())
+
+    def used_today(self, now: float | None = None) -> int:
+        return int(self.client.get(self._quota_key(now)) or 0)
+
+    def stats(self) -> dict:
+        return {
+            "calls_today": self.used_today(),
+            "daily_quota": self.daily_quota,
+            "circuit_open_for": round(self.blocked_for(), 1),
+            "recent_failures": int(self.client.get(self._keys()[0]) or 0),
+        }
@@ -0,0 +1,121 @@
+"""
+Common interface of job sources.
+
+A source turns a list of keywords into search hits, each carrying the keywords
+it was found for. JobScraperService runs every enabled source concurrently
+and feeds the merged hits through validation and persistence; each source has
+its own rate limiter and its health and latency are tracked per source.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar
+
+from app.job_validation import SearchHit
+from app.metrics import SOURCE_RUNS, SOURCE_SECONDS
+
+_HEALTH_KEY = "sources:health"  # HASH "<source>:<field>" -> value
+
+# Fold one run into a source's health fields (ARGV[1] the "<source>:" prefix); one
+# script, so runs recorded concurrently by several workers never overwrite each other
+_RECORD_RUN = """
+local key, prefix, seconds = KEYS[1], ARGV[1], tonumber(ARGV[2])
+redis.call('HINCRBY', key, prefix .. 'runs', 1)
+redis.call('HSET', key, prefix .. 'last_seconds', ARGV[2])
+local avg = tonumber(redis.call('HGET', key, prefix .. 'avg_seconds'))
+if avg then
+    avg = avg + tonumber(ARGV[6]) * (seconds - avg)
+else
+    avg = seconds
+end
+redis.call('HSET', key, prefix .. 'avg_seconds', tostring(avg))
+if ARGV[5] == '' then
+    redis.call('HSET', key, prefix .. 'last_success', ARGV[3], prefix .. 'last_hits', ARGV[4],
+        prefix .. 'consecutive_failures', 0)
+else
+    redis.call('HINCRBY', key, prefix .. 'errors', 1)
+    redis.call('HINCRBY', key, prefix .. 'consecutive_failures', 1)
+    redis.call('HSET', key, prefix .. 'last_failure', ARGV[3], prefix .. 'last_error', ARGV[5])
+end
+"""
+_EMA_ALPHA = 0.2  # Weight of the latest run in avg_seconds, so one slow run does not dominate
+_COUNT_FIELDS = {"runs", "errors", "consecutive_failures", "last_hits"}
+_SECONDS_FIELDS = {"last_seconds", "avg_seconds"}
+
+# Called with the keywords a query covered and the number of hits it returned
+SourceProgress = Callable[[list[str], int], None]
+
+
+@dataclass
+class SourceContext:
+    """What a source may need from the scrape that runs it."""
+
+    redis_service: object
+    db: object = None
+    search_engine: object = None  # Shared Custom Search engine (google)
+    planner: object = None  # Query packing (google)
+    cache: object = None  # Search page cache, when enabled
+    known_links: object = None  # Incremental-crawl link index, when enabled
+    options: dict = field(default_factory=dict)  # Constructor overrides, by source name
+
+
+@dataclass
+class SourceResult:
+    hits: list[SearchHit] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)  # Keywords to retry, not marked scraped
+    api_calls: dict[str, float] = field(default_factory=dict)  # Quota-metered calls per keyword
+    off_target: int = 0  # Results dropped by the location matcher
+    summary: dict = field(default_factory=dict)  # Merged into the scrape result as is
+
+
+class JobSource(ABC):
+    name: ClassVar[str]  # Registry name, as listed in SCRAPE_SOURCES
+    stored_as: ClassVar[str]  # job_posts.source of the rows it produces
+    # A failed run of a required source leaves all its keywords unmarked so they are
+    # retried; other sources only degrade the scrape
+    required: ClassVar[bool] = False
+
+    @classmethod
+    def from_context(cls, context: SourceContext) -> "JobSource":
+        return cls(**context.options.get(cls.name, {}))
+
+    @abstractmethod
+    async def search(
+        self, keywords: list[str], progress: SourceProgress | None = None
+    ) -> SourceResult:
+        """Search all keywords, spreading requests under this source's own rate limits."""
+
+
+class SourceHealth:
+    """Per-source health and latency of the latest runs, shared through Redis."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self._record_run = client.register_script(_RECORD_RUN)
+
+    def record(
+        self, name: str, seconds: float, hits: int, error: Exception | None = None
+    ) -> None:
+        SOURCE_SECONDS.labels(source=name).observe(seconds)
+        SOURCE_RUNS.labels(source=name, outcome="error" if error else "ok").inc()
+        last_error = f"{type(error).__name__}: {error}"[:300] if error is not None else ""
+        self._record_run(
+            keys=[_HEALTH_KEY],
+            args=[f"{name}:", seconds, time.time(), hits, last_error, _EMA_ALPHA],
+        )
+
+    def all(self) -> dict[str, dict]:
+        sources: dict[str, dict] = {}
+        for field_name, value in self.client.hgetall(_HEALTH_KEY).items():
+            name, _, metric = field_name.rpartition(":")
+            if not name:
+                continue  # JSON records written before the per-field layout
+            if metric in _COUNT_FIELDS:
+                value = int(value)
+            elif metric in _SECONDS_FIELDS:
+                value = round(float(value), 3)
+            elif metric != "last_error":
+                value = float(value)
+            sources.setdefault(name, {})[metric] = value
+        return sources
@@ -0,0 +1,173 @@
+"""
+Job board APIs that list a company's open positions in one response.
+
+Greenhouse and Lever publish every posting of a board without auth or
+Custom Search quota. Each configured board is fetched once per scrape and
+its listings are matched against all keywords locally, by title.
+"""
+
+import asyncio
+import re
+from abc import abstractmethod
+from typing import ClassVar
+
+import httpx
+
+from app.config import settings
+from app.enrichment import GREENHOUSE_API, LEVER_API
+from app.geo import default_matcher
+from app.job_validation import SearchHit
+from app.log_config import logger
+from app.rate_limiter import RequestLimiter
+from app.sources.base import JobSource, SourceProgress, SourceResult
+from app.sources.registry import register_source
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class BoardSource(JobSource):
+    """Common fetch, keyword matching and location filtering of board listings."""
+
+    base_url: ClassVar[str]
+
+    def __init__(
+        self,
+        boards: list[str],
+        rate_per_second: float,
+        max_concurrency: int = settings.BOARD_MAX_CONCURRENCY,
+        timeout: float = settings.BOARD_HTTP_TIMEOUT,
+        base_url: str | None = None,  # Override the API endpoint (e.g. a local mock)
+    ) -> None:
+        self.boards = list(boards)
+        self.rate_per_second = rate_per_second
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+
+    @abstractmethod
+    def listing_url(self, board: str) -> tuple[str, dict]:
+        """URL and query parameters of a board's full listing."""
+
+    @abstractmethod
+    def parse_listing(self, board: str, payload) -> list[SearchHit]:
+        """One hit per posting of a listing response, with the raw location."""
+
+    async def fetch_board(
+        self, client: httpx.AsyncClient, limiter: RequestLimiter, board: str
+    ) -> list[SearchHit]:
+        url, params = self.listing_url(board)
+        async with limiter:
+            response = await client.get(url, params=params)
+        response.raise_for_status()
+        return self.parse_listing(board, response.json())
+
+    async def search(
+        self, keywords: list[str], progress: SourceProgress | None = None
+    ) -> SourceResult:
+        result = SourceResult()
+        if not self.boards or not keywords:
+            return result
+        limiter = RequestLimiter(
+            self.max_concurrency, self.rate_per_second, max(1, int(self.rate_per_second))
+        )
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            listings = await asyncio.gather(
+                *(self.fetch_board(client, limiter, board) for board in self.boards),
+                return_exceptions=True,
+            )
+
+        postings = []
+        errors = []
+        for board, listing in zip(self.boards, listings):
+            if isinstance(listing, Exception):
+                # One unreachable board does not fail the keywords; the others still count
+                logger.error(f"{self.name} board '{board}' failed: {listing}")
+                errors.append(listing)
+                continue
+            postings.extend(listing)
+        if errors and len(errors) == len(self.boards):
+            raise errors[0]
+
+        wanted = [(keyword, set(_TOKEN_RE.findall(keyword.lower()))) for keyword in keywords]
+        matched = []
+        for hit in postings:
+            title_words = set(_TOKEN_RE.findall((hit.title or "").lower()))
+            hit.keywords = [keyword for keyword, tokens in wanted if tokens <= title_words]
+            if hit.keywords:
+                matched.append(hit)
+
+        texts = [f"{hit.title or ''} {hit.location or ''}" for hit in matched]
+        for hit, geo in zip(matched, default_matcher().classify_many(texts)):
+            if not geo.on_target:
+                result.off_target += 1
+                continue
+            hit.location = geo.location or hit.location
+            result.hits.append(hit)
+        logger.info(
+            f"{self.name}: {len(postings)} postings on {len(self.boards)} boards, "
+            f"{len(result.hits)} matching {len(keywords)} keywords"
+        )
+        if progress is not None:
+            progress(keywords, len(result.hits))
+        return result
+
+
+@register_source
+class GreenhouseBoardSource(BoardSource):
+    name = "greenhouse"
+    stored_as = "job_scraper_greenhouse_board"
+    base_url = GREENHOUSE_API
+
+    def __init__(self, boards: list[str] | None = None, **options) -> None:
+        options.setdefault("rate_per_second", settings.GREENHOUSE_RATE_PER_SECOND)
+        super().__init__(settings.GREENHOUSE_BOARDS if boards is None else boards, **options)
+
+    def listing_url(self, board: str) -> tuple[str, dict]:
+        return f"{self.base_url}/{board}/jobs", {}
+
+    def parse_listing(self, board: str, payload) -> list[SearchHit]:
+        hits = []
+        for job in payload.get("jobs", []):
+            location = (job.get("location") or {}).get("name")
+            # Department and job id keep same-titled reqs on one board apart
+            departments = [d.get("name") for d in job.get("departments") or []]
+            job_id = job.get("requisition_id") or job.get("id")
+            details = [board, *departments, location, job_id and f"Job {job_id}"]
+            snippet = " · ".join(dict.fromkeys(filter(None, details)))
+            hits.append(SearchHit(job.get("title"), job.get("absolute_url"), snippet, location))
+        return hits
+
+
+@register_source
+class LeverBoardSource(BoardSource):
+    name = "lever"
+    stored_as = "job_scraper_lever_board"
+    base_url = LEVER_API
+
+    def __init__(self, boards: list[str] | None = None, **options) -> None:
+        options.setdefault("rate_per_second", settings.LEVER_RATE_PER_SECOND)
+        super().__init__(settings.LEVER_COMPANIES if boards is None else boards, **options)
+
+    def listing_url(self, board: str) -> tuple[str, dict]:
+        return f"{self.base_url}/{board}", {"mode": "json"}
+
+    def parse_listing(self, board: str, payload) -> list[SearchHit]:
+        hits = []
+        for posting in payload:
+            categories = posting.get("categories") or {}
+            location = categories.get("location")
+            details = [
+                board,
+                categories.get("department"),
+                categories.get("team"),
+                categories.get("commitment"),
+                location,
+            ]
+            snippet = " · ".join(dict.fromkeys(filter(None, details)))
+            hits.append(SearchHit(posting.get("text"), posting.get("hostedUrl"), snippet, location))
+        return hits
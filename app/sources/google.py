@@ -0,0 +1,124 @@
+import math
+import time
+
+from app.config import settings
+from app.log_config import logger
+from app.query_planner import QueryPlanner
+from app.scraper_factory import async_scraper_factory
+from app.search_engine import AsyncSearchEngine
+from app.search_guard import SearchGuard
+from app.sources.base import JobSource, SourceContext, SourceProgress, SourceResult
+from app.sources.registry import register_source
+
+
+@register_source
+class GoogleSource(JobSource):
+    """
+    Google Custom Search: keywords packed into OR-clause queries by the planner,
+    all queries run concurrently under the search engine's shared rate limiter.
+    Every call goes through the shared SearchGuard (daily quota, circuit breaker).
+    """
+
+    name = "google"
+    stored_as = "job_scraper_cloud_GoogleSearch"
+    required = True  # The keyword marks and high-water marks follow this source
+
+    def __init__(
+        self,
+        redis_service,
+        search_engine: AsyncSearchEngine | None = None,
+        planner: QueryPlanner | None = None,
+        cache=None,
+        known_links=None,
+        guard: SearchGuard | None = None,
+    ) -> None:
+        self.redis = redis_service
+        self.search_engine = search_engine or AsyncSearchEngine()
+        self.planner = planner or QueryPlanner()
+        self.cache = cache
+        self.known_links = known_links
+        self.guard = guard or SearchGuard(redis_service.get_client())
+
+    @classmethod
+    def from_context(cls, context: SourceContext) -> "GoogleSource":
+        return cls(
+            context.redis_service,
+            search_engine=context.search_engine,
+            planner=context.planner,
+            cache=context.cache,
+            known_links=context.known_links,
+            **context.options.get(cls.name, {}),
+        )
+
+    async def search(
+        self, keywords: list[str], progress: SourceProgress | None = None
+    ) -> SourceResult:
+        started_at = time.time()
+        plan = self.planner.plan(keywords)
+        logger.info(f"Query plan for {len(keywords)} keywords: {plan.summary()}")
+        scrapers = [
+            async_scraper_factory(
+                group,
+                cache=self.cache,
+                num_results=self.planner.num_results(group),
+                known_links=self.known_links,
+                guard=self.guard,
+                date_restrict=self.date_restrict_for(group, started_at),
+            )
+            for group in plan.groups
+        ]
+
+        def query_done(scraper, results):
+            if progress is not None:
+                found = 0 if isinstance(results, Exception) else len(results)
+                progress(scraper.keywords, found)
+
+        outcomes = await self.search_engine.search_queries(scrapers, on_query_done=query_done)
+
+        result = SourceResult()
+        unattributed = 0
+        for scraper, outcome in zip(scrapers, outcomes):
+            if isinstance(outcome, Exception):
+                # Left unmarked; the worker re-queues them
+                result.failed.extend(scraper.keywords)
+                continue
+            if scraper.error is not None:
+                # Pages fetched before the error are kept, the keywords searched again later
+                logger.warning(
+                    f"Partial results for {scraper.keywords} ({len(outcome)} hits): {scraper.error}"
+                )
+                result.failed.extend(scraper.keywords)
+            for hit in outcome:
+                hit.keywords = self.planner.attribute(hit, scraper.keywords)
+                unattributed += not hit.keywords
+            result.hits.extend(outcome)
+            # A packed query's calls are shared evenly between its keywords
+            share = scraper.api_calls / len(scraper.keywords)
+            for keyword in scraper.keywords:
+                result.api_calls[keyword] = share
+        result.off_target = sum(scraper.off_target for scraper in scrapers)
+        result.summary = {
+            "query_plan": {**plan.summary(), "unattributed_hits": unattributed},
+            "incremental": {
+                "pages_fetched": sum(scraper.pages_fetched for scraper in scrapers),
+                # Each avoided page is one Custom Search call not made
+                "api_calls_avoided": sum(scraper.pages_avoided for scraper in scrapers),
+            },
+        }
+        return result
+
+    def date_restrict_for(self, group: list[str], now: float) -> str | None:
+        """
+        Custom Search `dateRestrict` covering everything since the group's oldest
+        high-water mark, or None (full crawl) when any keyword has none.
+        """
+        if not settings.SEARCH_INCREMENTAL:
+            return None
+        marks = [self.redis.get_high_water_mark(keyword) for keyword in group]
+        if any(mark is None for mark in marks):
+            return None
+        days = math.ceil((now - min(marks)) / 86400) or 1
+        if days > settings.SEARCH_INCREMENTAL_MAX_DAYS:
+            return None
+        # dateRestrict counts whole days; the extra day covers the partial one
+        return f"d{days + 1}"
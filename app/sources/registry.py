@@ -0,0 +1,49 @@
+"""
+Registry of job sources, by the name used in SCRAPE_SOURCES.
+
+Built-in sources are imported on first use, so enabling one costs nothing
+until it runs. A new source subclasses JobSource and registers itself:
+
+    @register_source
+    class MyBoardSource(JobSource):
+        name = "myboard"
+        stored_as = "job_scraper_myboard"
+        ...
+"""
+
+import importlib
+
+from app.sources.base import JobSource, SourceContext
+
+_SOURCES: dict[str, type[JobSource]] = {}
+
+# Built-in source name -> module registering it
+_BUILTIN = {
+    "google": "app.sources.google",
+    "greenhouse": "app.sources.boards",
+    "lever": "app.sources.boards",
+}
+
+
+def register_source(cls: type[JobSource]) -> type[JobSource]:
+    """Class decorator adding a JobSource to the registry under its `name`."""
+    existing = _SOURCES.get(cls.name)
+    if existing is not None and existing is not cls:
+        raise ValueError(f"Job source '{cls.name}' is already registered by {existing.__name__}")
+    _SOURCES[cls.name] = cls
+    return cls
+
+
+def source_class(name: str) -> type[JobSource]:
+    if name not in _SOURCES and name in _BUILTIN:
+        importlib.import_module(_BUILTIN[name])
+    try:
+        return _SOURCES[name]
+    except KeyError:
+        known = sorted({*_SOURCES, *_BUILTIN})
+        raise ValueError(f"Unknown job source '{name}' (known: {', '.join(known)})") from None
+
+
+def build_sources(names: list[str], context: SourceContext) -> list[JobSource]:
+    """Instantiate the named sources, in order (earlier sources win link collisions)."""
+    return [source_class(name).from_context(context) for name in dict.fromkeys(names)]
@@ -0,0 +1,125 @@
+import argparse
+import multiprocessing
+import os
+import signal
+
+from app.config import settings
+from app.database import session_scope
+from app.enrichment import DetailCache, enrich_pending
+from app.job_queue import ScrapeJobQueue
+from app.link_index import KnownLinkIndex
+from app.log_config import logger
+from app.metrics import mark_process_dead, start_metrics_server
+from app.redis_service import RedisService
+from app.resources import close_resources
+from app.retention import run_retention_loop
+from app.scheduler import KeywordScheduler, run_scheduler
+from app.scraper_service import JobScraperService
+from app.search_guard import SearchGuard
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def run_job(queue: ScrapeJobQueue, redis: RedisService, job_id: str, keywords: list[str]):
+    logger.info(f"Worker picked up scrape job {job_id}: {keywords}")
+    try:
+        with session_scope() as db:
+            scraper = JobScraperService(redis, db)
+            result = scraper.scrape(
+                keywords, progress=lambda counters: queue.report_progress(job_id, counters)
+            )
+    except Exception as e:
+        logger.exception(f"Scrape job {job_id} failed: {e}")
+        queue.finish(job_id, keywords, None, error=str(e))
+        return
+    queue.finish(job_id, keywords, result)
+    logger.info(f"Scrape job {job_id} completed: {result}")
+    # Bookkeeping for a job already reported done: a failure here must not finish it twice
+    try:
+        if result.get("failed_keywords"):
+            # Searched again later instead of being cached as empty; not before the
+            # circuit closes (or the daily quota resets)
+            blocked_for = SearchGuard(redis.get_client()).blocked_for()
+            queue.requeue(job_id, result["failed_keywords"], min_delay=blocked_for)
+        KeywordScheduler(redis, queue).record_run(keywords, result)
+    except Exception as e:
+        logger.exception(f"Re-queue/schedule bookkeeping for scrape job {job_id} failed: {e}")
+    if settings.ENRICH_AFTER_SCRAPE and result["added_jobs"]:
+        # Separate stage: the job is already reported done, details fill in afterwards
+        try:
+            with session_scope() as db:
+                enrich_pending(db, cache=DetailCache(redis.get_raw_client()))
+        except Exception as e:
+            logger.exception(f"Enrichment after scrape job {job_id} failed: {e}")
+
+
+def run_worker() -> None:
+    """Consume scrape jobs until SIGTERM/SIGINT."""
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    redis = RedisService()
+    queue = ScrapeJobQueue(redis)
+    # A retry of main()'s warm load (a no-op once loaded); the worker runs without it
+    try:
+        with session_scope() as db:
+            KnownLinkIndex(redis.get_client()).warm_load(db)
+    except Exception as e:
+        logger.error(f"❌ Failed to warm-load the dedup index: {e}")
+    logger.info("🛠️ Scrape worker started")
+    try:
+        while _running:
+            job = queue.dequeue(timeout=5)
+            if job is not None:
+                run_job(queue, redis, *job)
+    finally:
+        close_resources()
+    logger.info("🛠️ Scrape worker stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the scrape worker pool.")
+    parser.add_argument("--processes", type=int, default=settings.SCRAPE_WORKER_PROCESSES)
+    parser.add_argument("--metrics-port", type=int, default=settings.WORKER_METRICS_PORT)
+    args = parser.parse_args()
+
+    # Worker processes only share metrics through prometheus multiprocess mode
+    if args.metrics_port and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        start_metrics_server(args.metrics_port)
+    elif args.metrics_port:
+        logger.warning("PROMETHEUS_MULTIPROC_DIR is not set; worker metrics are disabled")
+
+    # Build the shared dedup index before scraping (a no-op once it is loaded)
+    try:
+        with session_scope() as db:
+            KnownLinkIndex(RedisService().get_client()).warm_load(db)
+    except Exception as e:
+        logger.error(f"❌ Failed to warm-load the dedup index: {e}")
+    finally:
+        close_resources()  # Forked workers must not inherit pooled connections
+
+    workers = [multiprocessing.Process(target=run_worker) for _ in range(args.processes)]
+    if settings.SCHEDULER_ENABLED:
+        workers.append(multiprocessing.Process(target=run_scheduler))
+    if settings.RETENTION_ENABLED:
+        workers.append(multiprocessing.Process(target=run_retention_loop))
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+    finally:
+        for worker in workers:
+            mark_process_dead(worker.pid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Concurrent load test for POST /scrape against a running API.
+
+Point the API at local stand-ins (docker compose redis/postgres and
+benchmarks/mock_custom_search.py as the search endpoint), start it with
+uvicorn, then run:
+
+    python -m benchmarks.load_scrape --url http://localhost:8000 --requests 500 --concurrency 50
+
+Run it once per build to compare p50/p99 latency; /health/pools is sampled at
+the end so pool saturation is visible next to the latency numbers.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def fire(client, url, api_key, index, latencies, errors, semaphore):
+    async with semaphore:
+        payload = {"keywords": [f"load test keyword {index}"]}
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                f"{url}/scrape", json=payload, headers={"x-api-key": api_key}
+            )
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors.append(index)
+            return
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(args) -> None:
+    latencies: list[float] = []
+    errors: list[int] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                fire(client, args.url, args.api_key, i, latencies, errors, semaphore)
+                for i in range(args.requests)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        pools = (await client.get(f"{args.url}/health/pools")).json()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} errors={len(errors)}")
+    if latencies:
+        print(f"throughput={len(latencies) / elapsed:.1f} req/s")
+        print(
+            f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms"
+        )
+    print(f"pools={json.dumps(pools)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default="your_scraper_api_key")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
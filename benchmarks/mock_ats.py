@@ -0,0 +1,131 @@
+"""
+Local stand-in for ATS posting endpoints, serving the recorded fixtures in
+benchmarks/fixtures/enrichment/.
+
+    /v1/boards/<board>/jobs          Greenhouse board listing (synthetic)
+    /v1/boards/<board>/jobs/<id>     Greenhouse job JSON
+    /v0/postings/<company>           Lever postings listing (synthetic)
+    /v0/postings/<company>/<id>      Lever posting JSON
+    /missing/...                     404
+    anything else                    HTML page with JobPosting JSON-LD
+
+Responses carry ETag and Last-Modified and honour conditional requests with 304.
+"""
+
+import hashlib
+import json
+import threading
+import uuid
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures" / "enrichment"
+_LAST_MODIFIED = "Tue, 30 Sep 2026 08:00:00 GMT"
+_LISTING_TITLES = (
+    "Backend Engineer", "Senior Python Developer", "DevOps Engineer", "Data Engineer",
+    "Frontend Developer", "Product Manager", "QA Automation Engineer",
+)  # fmt: skip
+_LISTING_LOCATIONS = ("Tel Aviv, Israel", "Haifa", "Herzliya, Israel", "Berlin, Germany", "")
+
+
+def listing(ats: str, board: str, size: int) -> bytes:
+    """A board's full listing in the ATS's API shape, deterministic per board."""
+    postings = []
+    for i in range(size):
+        title = f"{_LISTING_TITLES[i % len(_LISTING_TITLES)]} {board} {i}"
+        location = _LISTING_LOCATIONS[i % len(_LISTING_LOCATIONS)]
+        if ats == "greenhouse":
+            postings.append(
+                {
+                    "id": 4000000 + i,
+                    "title": title,
+                    "absolute_url": f"https://boards.greenhouse.io/{board}/jobs/{4000000 + i}",
+                    "location": {"name": location},
+                }
+            )
+        else:
+            posting_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{board}/{i}")
+            postings.append(
+                {
+                    "id": str(posting_id),
+                    "text": title,
+                    "hostedUrl": f"https://jobs.lever.co/{board}/{posting_id}",
+                    "categories": {"location": location, "team": "R&D"},
+                }
+            )
+    return json.dumps({"jobs": postings} if ats == "greenhouse" else postings).encode()
+
+
+class MockATSServer:
+    """Threaded HTTP server answering posting requests on localhost."""
+
+    def __init__(self, latency: float = 0.05, port: int = 0, listing_size: int = 50) -> None:
+        self.latency = latency
+        self.listing_size = listing_size
+        self.responses: Counter = Counter()  # Status code -> count
+        self._lock = threading.Lock()
+        self._bodies = {
+            "greenhouse": ((FIXTURES / "greenhouse_job.json").read_bytes(), "application/json"),
+            "lever": ((FIXTURES / "lever_posting.json").read_bytes(), "application/json"),
+            "html": ((FIXTURES / "jsonld_posting.html").read_bytes(), "text/html; charset=utf-8"),
+        }
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                time.sleep(server.latency)
+                if self.path.startswith("/missing/"):
+                    return self._reply(404)
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:2] == ["v1", "boards"] and len(parts) == 4:
+                    body = listing("greenhouse", parts[2], server.listing_size)
+                    content_type = "application/json"
+                elif parts[:2] == ["v0", "postings"] and len(parts) == 3:
+                    body = listing("lever", parts[2], server.listing_size)
+                    content_type = "application/json"
+                elif self.path.startswith("/v1/boards/"):
+                    body, content_type = server._bodies["greenhouse"]
+                elif self.path.startswith("/v0/postings/"):
+                    body, content_type = server._bodies["lever"]
+                else:
+                    body, content_type = server._bodies["html"]
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._reply(304, headers={"ETag": etag})
+                self._reply(
+                    200,
+                    body,
+                    {"Content-Type": content_type, "ETag": etag, "Last-Modified": _LAST_MODIFIED},
+                )
+
+            def _reply(self, status: int, body: bytes = b"", headers: dict | None = None):
+                with server._lock:
+                    server.responses[status] += 1
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockATSServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
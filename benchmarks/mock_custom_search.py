@@ -0,0 +1,140 @@
+"""
+Local stand-in for the Google Custom Search JSON API.
+
+Serves deterministic `items` pages for any `q`/`start`/`num` with a fixed
+artificial latency, so benchmarks can measure scheduling rather than Google.
+A share of the results (`duplicate_ratio`) comes from a small pool of postings
+that every query returns, like reposted jobs do; recorded response pages can
+be replayed instead of synthetic ones. Queued `faults` are served first, as
+Google-style error responses, to exercise retries and the circuit breaker.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+_SHARED_POSTINGS = 200  # Pool the duplicate share of results is drawn from
+
+
+def _hash(text: str) -> int:
+    return int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+
+
+def make_items(
+    query: str, start: int, num: int, total: int, duplicate_ratio: float = 0.0
+) -> list[dict]:
+    items = []
+    digest = _hash(query)
+    for position in range(start, min(start + num, total + 1)):
+        draw = _hash(f"{query}|{position}")
+        if draw % 1000 < duplicate_ratio * 1000:
+            shared = draw % _SHARED_POSTINGS
+            title = f"Platform Engineer {shared}"
+            link = f"https://boards.greenhouse.io/shared/jobs/{shared:04d}"
+            snippet = f"Tel Aviv, Israel. Reposted position {shared}"
+        else:
+            title = f"Backend Engineer {digest}-{position}"
+            link = f"https://boards.greenhouse.io/acme/jobs/{digest}{position:04d}"
+            snippet = f"Tel Aviv, Israel. Position {position} for {query[-40:]}"
+        items.append(
+            {
+                "kind": "customsearch#result",
+                "title": title,
+                "link": link,
+                "snippet": snippet,
+                "displayLink": "boards.greenhouse.io",
+            }
+        )
+    return items
+
+
+def error_body(status: int, reason: str) -> dict:
+    """An error response shaped like the Custom Search API's."""
+    message = {
+        "rateLimitExceeded": "Quota exceeded for quota metric 'Queries' per minute.",
+        "dailyLimitExceeded": "Quota exceeded for quota metric 'Queries' per day.",
+    }.get(reason, f"Mock {reason} error")
+    return {
+        "error": {
+            "code": status,
+            "message": message,
+            "errors": [{"message": message, "domain": "global", "reason": reason}],
+        }
+    }
+
+
+class MockCustomSearchServer:
+    """Threaded HTTP server answering Custom Search requests on localhost."""
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        total_results: int = 20,
+        port: int = 0,
+        duplicate_ratio: float = 0.0,
+        replay: list[dict] | None = None,  # Recorded API responses, served instead
+        faults: list[tuple[int, str]] | None = None,  # (status, reason) served first, in order
+    ) -> None:
+        self.latency = latency
+        self.total_results = total_results
+        self.duplicate_ratio = duplicate_ratio
+        self.replay = replay
+        self.faults = list(faults or [])
+        self.retry_after: int | None = None  # Retry-After sent with 429 faults
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                params = parse_qs(urlparse(self.path).query)
+                query = params.get("q", [""])[0]
+                start = int(params.get("start", ["1"])[0])
+                num = int(params.get("num", ["10"])[0])
+                time.sleep(server.latency)
+                with server._lock:
+                    server.requests_served += 1
+                    fault = server.faults.pop(0) if server.faults else None
+                status = 200
+                if fault is not None:
+                    status, reason = fault
+                    body = json.dumps(error_body(status, reason)).encode()
+                elif server.replay:
+                    page = _hash(query) + (start - 1) // 10
+                    body = json.dumps(server.replay[page % len(server.replay)]).encode()
+                else:
+                    items = make_items(
+                        query, start, num, server.total_results, server.duplicate_ratio
+                    )
+                    body = json.dumps({"items": items} if items else {}).encode()
+                self.send_response(status)
+                if status == 429 and server.retry_after is not None:
+                    self.send_header("Retry-After", str(server.retry_after))
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}/customsearch/v1"
+
+    def __enter__(self) -> "MockCustomSearchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()